@@ -5,10 +5,10 @@ Color builders for color terminals.
 """
 
 import sys
-from functools import partial
+from functools import lru_cache
 
 
-__all__ = ['color', 'color256', 'underline', 'inverse', 'box', 'clear']
+__all__ = ['color', 'color256', 'underline', 'inverse', 'box', 'boxed', 'clear']
 
 
 RESET = NORMAL = "\x1b[0m"
@@ -94,35 +94,61 @@ _BG_MAP = {
 }
 
 
+# Escape prefix for every (fg, bg, bold) combination color() accepts.
+_PREFIX = {}
+for _bold, _fgmap in ((False, _FG_MAP), (True, _LT_FG_MAP)):
+    for _fg, _fgcode in _fgmap.items():
+        for _bg, _bgcode in _BG_MAP.items():
+            _PREFIX[(_fg, _bg, _bold)] = _fgcode + _bgcode
+del _bold, _fgmap, _fg, _fgcode, _bg, _bgcode
+
+
 def color(text, fg, bg=None, bold=False):
     try:
-        c = _LT_FG_MAP[fg] if bold else _FG_MAP[fg]
-        sys.stdout.write(c + _BG_MAP[bg] + text + RESET)
+        c = _PREFIX[(fg, bg, bool(bold))]
     except KeyError:
         raise ValueError("Bad color value: {},{}".format(fg, bg))
+    sys.stdout.write(c + text + RESET)
+
+
+@lru_cache(maxsize=512)
+def _color256_prefix(fg, bg):
+    return "\x1b[38;5;{};48;5;{}m".format(fg, bg)
 
 
 def color256(text: str, fg: int, bg: int = 0):
-    sys.stdout.write("\x1b[38;5;{};48;5;{}m".format(fg, bg))
-    sys.stdout.write(text)
-    sys.stdout.write(RESET)
+    sys.stdout.write(_color256_prefix(fg, bg) + text + RESET)
+
+
+def _colorizer(fg, bold=False):
+    """Make a writer for one foreground color, with its usual prefix resolved up front."""
+    prefix = _PREFIX[(fg, None, bold)]
+    default_fg, default_bold = fg, bold
+
+    def colorize(text, bg=None, bold=bold, fg=fg):
+        if bg is None and fg == default_fg and bool(bold) == default_bold:
+            sys.stdout.write(prefix + text + RESET)
+        else:
+            color(text, fg, bg, bold)
+    colorize.__name__ = colorize.__qualname__ = ("lt_" if bold else "") + fg
+    return colorize
 
 
-red = partial(color, fg="red")
-green = partial(color, fg="green")
-blue = partial(color, fg="blue")
-cyan = partial(color, fg="cyan")
-magenta = partial(color, fg="magenta")
-yellow = partial(color, fg="yellow")
-grey = partial(color, fg="grey")
-white = partial(color, fg="white")
+red = _colorizer("red")
+green = _colorizer("green")
+blue = _colorizer("blue")
+cyan = _colorizer("cyan")
+magenta = _colorizer("magenta")
+yellow = _colorizer("yellow")
+grey = _colorizer("grey")
+white = _colorizer("white")
 
-lt_red = partial(color, fg="red", bold=True)
-lt_green = partial(color, fg="green", bold=True)
-lt_blue = partial(color, fg="blue", bold=True)
-lt_cyan = partial(color, fg="cyan", bold=True)
-lt_magenta = partial(color, fg="magenta", bold=True)
-lt_yellow = partial(color, fg="yellow", bold=True)
+lt_red = _colorizer("red", bold=True)
+lt_green = _colorizer("green", bold=True)
+lt_blue = _colorizer("blue", bold=True)
+lt_cyan = _colorizer("cyan", bold=True)
+lt_magenta = _colorizer("magenta", bold=True)
+lt_yellow = _colorizer("yellow", bold=True)
 
 
 def underline(text):
@@ -134,19 +160,26 @@ def inverse(text):
 
 
 #                 UL  hor   vert  UR  LL   LR
-_BOXCHARS = {1: ['┏', '━', '┃', '┓', '┗', '┛'],
-             0: ['╔', '═', '║', '╗', '╚', '╝'],
-             2: ['┌', '─', '│', '┐', '└', '┘']}
+_BOXCHARS = {1: ('┏', '━', '┃', '┓', '┗', '┛'),
+             0: ('╔', '═', '║', '╗', '╚', '╝'),
+             2: ('┌', '─', '│', '┐', '└', '┘')}
 
 
-def box(text, level=0, color=GREY):
+@lru_cache(maxsize=64)
+def _box_rules(level, width):
     UL, hor, vert, UR, LL, LR = _BOXCHARS[level]
-    tt = "{}{}{}".format(UL, hor * (len(text) + 2), UR)
-    bt = "{}{}{}".format(LL, hor * (len(text) + 2), LR)
-    ml = "{} {}{}{} {}".format(vert, color, text, RESET, vert)
-    sys.stdout.write("\n")
-    sys.stdout.write("\n".join((tt, ml, bt)))
-    sys.stdout.write("\n")
+    hor_run = hor * width
+    return f"\n{UL}{hor_run}{UR}\n{vert} ", f" {vert}\n{LL}{hor_run}{LR}\n"
+
+
+def boxed(text, level=0, color=GREY):
+    """Return *text* framed in a box, as box() would write it."""
+    top, bottom = _box_rules(level, len(text) + 2)
+    return f"{top}{color}{text}{RESET}{bottom}"
+
+
+def box(text, level=0, color=GREY):
+    sys.stdout.write(boxed(text, level, color))
 
 
 def clear():
@@ -21,9 +21,15 @@ text, and also defines the command options.
 __all__ = ['BaseCommands', 'ObjectCommands']
 
 import textwrap
-import functools
-import readline
-from types import MethodType
+# Private names, since bare words given as command arguments are looked up
+# in this module's globals.
+import ast as _ast
+import copy as _copy
+import keyword as _keyword
+import builtins as _builtins
+from functools import lru_cache as _lru_cache
+from collections import UserDict as _UserDict
+from types import FunctionType as _FunctionType
 
 from . import exceptions
 
@@ -35,7 +41,12 @@ class BaseCommands:
     def __init__(self, ui, aliases=None, prompt="> "):
         self._ui = ui
         self._environ = ui.environ
-        self._aliases = aliases or {}
+        # An _Aliases mapping is used as is, and shared with the caller. Any
+        # other mapping is copied into a new one, so later changes to it are
+        # not seen here.
+        if not isinstance(aliases, _Aliases):
+            aliases = _Aliases(aliases or {})
+        self._aliases = aliases
         self._environ.setdefault("PS1", str(prompt))
 
     def clone(self, cliclass=None, theme=None):
@@ -92,21 +103,14 @@ class BaseCommands:
         if not names:
             names = list(self._environ.keys())
             names.sort()
-            ms = functools.reduce(max, map(len, names))
-            for name in names:
-                value = self._environ[name]
-                if not self._ui.write(
-                        "{:{maxsize}s} = {}\n".format(
-                        name, repr(value), maxsize=ms)):
-                    break
+            ms = max(map(len, names), default=0)
+            env = self._environ
+            self._ui.write("".join([f"{name:<{ms}} = {env[name]!r}\n" for name in names]))
         else:
-            s = []
-            for name in names:
-                try:
-                    s.append("{} = {}\n".format(name, repr(self._environ[name])))
-                except KeyError:
-                    s.append("'{}' not in environment.\n".format(name))
-            self._ui.write("".join(s))
+            env = self._environ
+            self._ui.write("".join([f"{name} = {env[name]!r}\n" if name in env
+                                    else f"'{name}' not in environment.\n"
+                                    for name in names]))
 
     def history(self, arguments):
         """Display the current readline history buffer.
@@ -114,13 +118,21 @@ class BaseCommands:
         Usage:
             history [<index>]
         """
+        import readline
         index = arguments["<index>"]
         if index:
             idx = int(index)
             self._ui.print(readline.get_history_item(idx))
         else:
-            for i in range(readline.get_current_history_length()):
-                self._ui.print(readline.get_history_item(i))
+            # History items are numbered from one. The length is a constant
+            # time query, so it is not worth caching (and possibly going stale
+            # when input() adds lines behind our back).
+            n = readline.get_current_history_length()
+            if n:
+                get_item = readline.get_history_item
+                lines = [get_item(i) or "" for i in range(1, n + 1)]
+                lines.append("")
+                self._ui.write("\n".join(lines))
 
     def export(self, arguments):
         """Sets environment variable that new processes will inherit.
@@ -140,11 +152,11 @@ class BaseCommands:
         Usage:
             unset <envar>
         """
-        try:
-            del self._environ[arguments["<envar>"]]
-        except KeyError:
+        name = arguments["<envar>"]
+        if name not in self._environ:
             self._ui.warning("No such environment variable.")
             return 1
+        del self._environ[name]
 
     def setenv(self, arguments):
         """Sets the environment variable NAME to VALUE, like C shell.
@@ -174,10 +186,11 @@ class BaseCommands:
         """
         args = arguments["<commandname>"]
         if not args:
-            for name in get_command_list(self):
-                doc = getattr(self, name).__doc__
-                firstline = doc.split("\n")[0].strip()
-                self._ui.printf("%W{}%N {}\n".format(name, firstline))
+            with self._ui.batched():
+                for name in _scan_commands(self)[1]:
+                    doc = getattr(self, name).__doc__
+                    firstline = doc.split("\n")[0].strip()
+                    self._ui.printf("%W{}%N {}\n".format(name, firstline))
             return
         for name in args:
             try:
@@ -202,13 +215,13 @@ class BaseCommands:
         """
         argv = arguments["argv"][:]
         if len(argv) == 1:
-            for name, val in self._aliases.items():
-                self._ui.print("alias %s='%s'" % (name, " ".join(val)))
+            self._ui.write("".join([f"alias {name}='{text}'\n"
+                                    for name, text in self._aliases.text_items()]))
             return 0
         elif len(argv) == 2 and '=' not in argv[1]:
             name = argv[1]
             try:
-                self._ui.print("%s=%s" % (name, " ".join(self._aliases[name])))
+                self._ui.print("%s=%s" % (name, self._aliases.text(name)))
             except KeyError:
                 self._ui.print("undefined alias.")
             return 0
@@ -235,10 +248,11 @@ class BaseCommands:
         Usage:
             unalias <name>
         """
-        try:
-            del self._aliases[arguments["<name>"]]
-        except (IndexError, KeyError):
-            self._ui.print("unalias: {}: not found".format(arguments["<name>"]))
+        name = arguments["<name>"]
+        if name in self._aliases:
+            del self._aliases[name]
+        else:
+            self._ui.print("unalias: {}: not found".format(name))
 
 
 class ObjectCommands(BaseCommands):
@@ -266,18 +280,16 @@ class ObjectCommands(BaseCommands):
         return cls(newui, other._obj, aliases=other._aliases)
 
     def _get_namespace(self):
-        try:
-            ns = vars(self._obj)
-        except:  # noqa
-            ns = globals()
-        return ns
+        ns = getattr(self._obj, "__dict__", None)  # what vars() would return
+        return globals() if ns is None else ns
 
     def ls(self, arguments):
         """List attributes of wrapped object.
         """
-        for name in dir(self._obj):
-            attr = getattr(self._obj, name)
-            self._ui.print(name, ":", repr(attr))
+        obj = self._obj
+        with self._ui.batched():
+            for name in dir(obj):
+                self._ui.write("{} : {!r}\n".format(name, getattr(obj, name)))
 
     def call(self, arguments):
         """Call a method on the wrapped object.
@@ -312,31 +324,141 @@ def evaluate_arguments(argv, namespace=None):
     return tuple(args), kwargs
 
 
-def get_command_list(commands):
+class _Aliases(_UserDict):
+    """Alias name to argument list mapping.
+
+    Keeps the fully resolved expansion of each alias looked up, until the
+    mapping is next changed, and the display text of each alias.
+    """
+    def __init__(self, *args, **kwargs):
+        self._expanded = {}
+        self._text = {}
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, name, value):
+        self._expanded.clear()
+        self.data[name] = value
+        self._text[name] = " ".join(value)
+
+    def __delitem__(self, name):
+        self._expanded.clear()
+        del self.data[name]
+        del self._text[name]
+
+    def text(self, name):
+        """Return the alias value as a single string."""
+        return self._text[name]
+
+    def text_items(self):
+        """Return (name, text) pairs for all aliases."""
+        return self._text.items()
+
+    def expand(self, name):
+        """Return the argument list that replaces *name*, or None."""
+        try:
+            expansion = self._expanded[name]
+        except KeyError:
+            pass
+        else:
+            return expansion and list(expansion)  # the cached one stays intact
+        expansion = None
+        seen = set()
+        alias = self.data.get(name)
+        while alias:
+            if alias[0] in seen:
+                break  # alias loop
+            seen.add(alias[0])
+            expansion = alias + expansion[1:] if expansion else list(alias)
+            alias = self.data.get(alias[0])
+        self._expanded[name] = expansion
+        return expansion and list(expansion)
+
+
+# Command names per BaseCommands subclass, as a pair of tuples: all names,
+# including aliased ones, and the sorted unique command names.
+# Classes that add commands at run time can set _dynamic_commands = True to
+# be rescanned on every call.
+_COMMAND_LIST_CACHE = {}
+
+
+def _scan_commands(commands):
+    cls = type(commands)
+    dynamic = getattr(cls, "_dynamic_commands", False)
+    if not dynamic:
+        cached = _COMMAND_LIST_CACHE.get(cls)
+        if cached is not None:
+            return cached
+    # Commands are functions (or classmethods) with a docstring defined on the
+    # class. Walk the class dictionaries directly, most derived first, rather
+    # than binding every attribute that dir() reports.
+    names = []
     hashfilter = {}
-    for name in filter(functools.partial(_command_filt, commands), dir(commands)):
-        # this filters out aliased names (same function id)
-        meth = getattr(commands, name)
-        hashfilter[id(meth.__func__)] = meth.__func__.__name__
-    command_list = list(hashfilter.values())
-    command_list.sort()
-    return command_list
+    seen = set()
+    for klass in cls.__mro__:
+        for name, obj in vars(klass).items():
+            if name in seen:
+                continue
+            seen.add(name)
+            if name.startswith("_"):
+                continue
+            if isinstance(obj, classmethod):
+                obj = obj.__func__
+            if isinstance(obj, _FunctionType) and obj.__doc__:
+                names.append(name)
+                # this filters out aliased names (same function id)
+                hashfilter[id(obj)] = obj.__name__
+    names.sort()
+    result = (tuple(names), tuple(sorted(hashfilter.values())))
+    if not dynamic:
+        _COMMAND_LIST_CACHE[cls] = result
+    return result
+
+
+def get_command_list(commands):
+    return list(_scan_commands(commands)[1])
+
+
+def get_command_table(commands):
+    """Map every command name, including aliased method names, to the bound
+    method on *commands*.
+    """
+    return {name: getattr(commands, name) for name in _scan_commands(commands)[0]}
+
+
+_IMMUTABLE = {int, float, complex, bool, str, bytes, type(None)}
+
+
+@_lru_cache(maxsize=256)
+def _literal(val):
+    """Return (True, value) if val is a Python literal, else (False, None)."""
+    try:
+        return True, _ast.literal_eval(val)
+    except Exception:  # noqa
+        return False, None
+
+
+@_lru_cache(maxsize=128)
+def _compile(val):
+    # eval() of a string ignores leading blanks, compile() does not.
+    return compile(val.lstrip(" \t"), "<argument>", "eval")
 
 
 def _convert(val, namespace):
+    if val.isidentifier() and not _keyword.iskeyword(val):
+        # Same lookup order as eval() with these namespaces.
+        for ns in (namespace, globals(), vars(_builtins)):
+            try:
+                return ns[val]
+            except KeyError:
+                pass
+        return val
+    ok, value = _literal(val)
+    if ok:
+        # The cached value may be a container the command goes on to modify.
+        return value if type(value) in _IMMUTABLE else _copy.deepcopy(value)
     try:
-        return eval(val, globals(), namespace)
+        return eval(_compile(val), globals(), namespace)
     except:  # noqa
         return val
 
-
-def _command_filt(cmd, objname):
-    if objname.startswith("_"):
-        return 0
-    obj = getattr(cmd, objname)
-    if type(obj) is MethodType and obj.__doc__:
-        return 1
-    else:
-        return 0
-
 # vim:ts=4:sw=4:softtabstop=4:smarttab:expandtab
@@ -16,35 +16,57 @@ Completer module.
 
 import keyword
 import builtins
+from bisect import bisect_left
+
+_BUILTIN_NAMES = frozenset(keyword.kwlist).union(dir(builtins))
+_SORTED_BUILTIN_NAMES = tuple(sorted(_BUILTIN_NAMES))
 
 
 class Completer:
     def __init__(self, namespace):
         assert isinstance(namespace, dict), "namespace must be a dict type"
         self.namespace = namespace
-        self._globals = get_globals()
-        self._globals.extend(str(k) for k in namespace.keys())
-        self.matches = []
+        self._index_globals()
+        self.matches = ()
+
+    def _index_globals(self):
+        # Sorting the already sorted builtins plus a sorted run of new names is
+        # a linear merge.
+        names = list(_SORTED_BUILTIN_NAMES)
+        names.extend(sorted(set(map(str, self.namespace.keys())).difference(_BUILTIN_NAMES)))
+        names.sort()
+        self._sorted_globals = names
+        self._indexed_size = len(self.namespace)
 
     def complete(self, text, state):
         if state == 0:
-            self.matches = []
+            # Names are usually only added to an interactive namespace, so a
+            # size change is a cheap signal that the index is out of date.
+            if len(self.namespace) != self._indexed_size:
+                self._index_globals()
             if "." in text:
-                for name, obj in self.namespace.items():
-                    for key in dir(obj):
-                        if key.startswith("__"):
-                            continue
-                        lname = "%s.%s" % (name, key)
-                        if lname.startswith(text):
-                            self.matches.append(lname)
+                name, _, attr = text.partition(".")
+                self.matches = tuple("%s.%s" % (name, key)
+                                     for key in get_prefixed(self._get_attributes(name), attr))
             else:
-                for key in self._globals:
-                    if key.startswith(text):
-                        self.matches.append(key)
+                self.matches = tuple(get_prefixed(self._sorted_globals, text))
+        return self.matches[state] if state < len(self.matches) else None
+
+    def _get_attributes(self, name):
         try:
-            return self.matches[state]
-        except IndexError:
-            return None
+            obj = self.namespace[name]
+        except KeyError:
+            return []
+        # Looked up on every completion, so attributes added since show up.
+        # dir() returns the names sorted.
+        return [key for key in dir(obj) if not key.startswith("__")]
+
+
+def get_prefixed(names, prefix):
+    """Return the slice of sorted list *names* starting with *prefix*."""
+    lo = bisect_left(names, prefix)
+    hi = bisect_left(names, prefix + "\U0010ffff", lo)
+    return names[lo:hi]
 
 
 def get_class_members(klass, rv=None):
@@ -59,7 +81,6 @@ def get_class_members(klass, rv=None):
 
 
 def get_globals():
-    rv = keyword.kwlist + dir(builtins)
-    return list(set(rv))  # Remove duplicates
+    return list(_SORTED_BUILTIN_NAMES)
 
 # vim:ts=4:sw=4:softtabstop=4:smarttab:expandtab
@@ -22,6 +22,8 @@ import sys
 import os
 import signal
 import tty
+import re
+from functools import lru_cache
 
 from . import exceptions
 
@@ -31,6 +33,11 @@ class ConsoleIO:
 
     Implicitly pages output if too many lines are printed (like *more*).
     """
+    __slots__ = ("stdin", "stdout", "stderr", "mode", "closed", "softspace",
+                 "_size", "pagerprompt", "prompterase", "_pause_prefix",
+                 "_pause_suffix", "_writtenlines", "_oldhandler", "read",
+                 "readline", "readlines", "write", "writelines", "flush")
+
     def __init__(self, pagerprompt=None):
         self.set_pagerprompt(pagerprompt)
         self.stdin = sys.stdin
@@ -41,13 +48,13 @@ class ConsoleIO:
         self.softspace = 0
         self._writtenlines = 0
         if self.stdout.isatty():  # page only if output is a tty
-            self.set_size()
+            self._size = None  # asked for when first needed
             self._oldhandler = signal.getsignal(signal.SIGWINCH)
             signal.signal(signal.SIGWINCH, self._winch_handler)
             self.write = self.paged_write
             self.writelines = self.paged_writelines
         else:
-            self.columns, self.rows = 80, 24
+            self._size = (80, 24)
             self.write = self.stdout.write
             self.writelines = self.stdout.writelines
         self.read = self.stdin.read
@@ -56,15 +63,43 @@ class ConsoleIO:
         self.flush = self.stdout.flush
 
     def set_size(self):
-        self.columns, self.rows = os.get_terminal_size()
+        self._size = tuple(os.get_terminal_size())
+
+    @property
+    def columns(self):
+        if self._size is None:
+            self.set_size()
+        return self._size[0]
+
+    @columns.setter
+    def columns(self, value):
+        self._size = (value, self.rows)
+
+    @property
+    def rows(self):
+        if self._size is None:
+            self.set_size()
+        return self._size[1]
+
+    @rows.setter
+    def rows(self, value):
+        self._size = (self.columns, value)
 
     def set_pagerprompt(self, pagerprompt):
         self.pagerprompt = pagerprompt or "-- more (press any key to continue) --"
         lpp = len(self.pagerprompt)
         self.prompterase = "\r" + " " * lpp + "\r"
+        # What _pause writes around the prompt, encoded once. Save the cursor
+        # and start a new line before; erase, restore and go up one line after.
+        encoding = getattr(sys.stdout, "encoding", None) or "utf-8"
+        self._pause_prefix = ("\033[s\n" + self.pagerprompt).encode(encoding, "replace")
+        self._pause_suffix = (self.prompterase + "\033[u\033[1A").encode(encoding, "replace")
 
     def _winch_handler(self, sig, st):
-        self.set_size()
+        # A resize sends a burst of signals; query the size once, on next use.
+        self._size = None
+        if callable(self._oldhandler):
+            self._oldhandler(sig, st)
 
     def input(self, prompt="> "):
         self._writtenlines = 1  # reset paging when input requested
@@ -91,21 +126,25 @@ class ConsoleIO:
         return self.stdin.isatty() and self.stdout.isatty()
 
     def error(self, text):
-        self.stderr.write(text.encode("latin1") + b"\n")  # 1:1 bytes
+        self.stderr.write(text.encode("latin1", "replace") + b"\n")  # 1:1 bytes
         self.stderr.flush()
 
     def paged_write(self, data):
+        write = self.stdout.write
+        get_index = self._get_index
         written = 0
         ld = len(data)
         rows = self.rows - 2
-        needed = rows - self._writtenlines
+        writtenlines = self._writtenlines  # stored back on return
+        needed = rows - writtenlines
         i = 0
         while i < ld:
             b = i
-            i, lines = self._get_index(data, needed, i)
-            written += self.stdout.write(data[b:i])
-            self._writtenlines += lines
-            if self._writtenlines >= rows:
+            i, lines = get_index(data, needed, i)
+            written += write(data[b:i])
+            writtenlines += lines
+            if writtenlines >= rows:
+                writtenlines = 0
                 c = self._pause()
                 if c in "qQ":
                     raise exceptions.PageQuit("User quit output")
@@ -117,11 +156,11 @@ class ConsoleIO:
                     raise EOFError("User end input")
                 else:
                     rows = needed = self.rows - 1
+        self._writtenlines = writtenlines
         return written
 
     def paged_writelines(self, lines):
-        for line in lines:
-            self.paged_write(line)
+        return self.paged_write("".join(lines))
 
     # get the index into the data string that will give you the needed number
     # of lines, also taking into account implicit wrapping.
@@ -129,6 +168,16 @@ class ConsoleIO:
         cols = self.columns
         line = n = 0
         ld = len(data)
+        # Common case: the rest fits on the page and has no line long enough to
+        # wrap. Then every line counts once, and str.count and a regex search
+        # do the work in C. Only taken when the rest is at most a page worth of
+        # characters, so large outputs are not rescanned for every page.
+        if ld - i <= needed * cols and not _long_line(cols).search(data, i):
+            unterminated = data[-1] != "\n"
+            line = data.count("\n", i) + unterminated
+            if line <= needed:
+                return ld + unterminated, line
+            line = 0
         while 1:
             n = data.find("\n", i)
             n = ((n < 0 and ld) or n) + 1
@@ -140,25 +189,44 @@ class ConsoleIO:
     def _pause(self):
         c = ""
         self._writtenlines = 0
-        savestate = tty.tcgetattr(self.stdin)
-        self.stdout.write("\033[s\n")  # save cursor and start new line
-        self.stdout.write(self.pagerprompt)
+        # Read the current mode on every pause; the program may have changed
+        # it since the last one.
+        cooked = tty.tcgetattr(self.stdin)
+        raw = _raw_mode(cooked)
         self.stdout.flush()
+        out = self.stdout.buffer
+        out.write(self._pause_prefix)
+        out.flush()
         try:
-            tty.setraw(self.stdin)
-            while 1:
-                try:
-                    c = self.stdin.read(1)
-                    break
-                except InterruptedError:
-                    continue
+            tty.tcsetattr(self.stdin, tty.TCSAFLUSH, raw)
+            # Read the key press from the descriptor itself; in raw mode the
+            # text layer only adds decoder work. os.read retries on EINTR.
+            c = os.read(self.stdin.fileno(), 1).decode("latin1")
         finally:
-            tty.tcsetattr(self.stdin, tty.TCSAFLUSH, savestate)
-        self.stdout.write(self.prompterase)
-        self.stdout.write("\033[u\033[1A")  # resture cursor and go up 1 line
+            tty.tcsetattr(self.stdin, tty.TCSAFLUSH, cooked)
+        out.write(self._pause_suffix)
         return c
 
 
+def _raw_mode(mode):
+    """Return a copy of terminal *mode* changed the way tty.setraw changes it."""
+    mode = list(mode)
+    mode[tty.IFLAG] &= ~(tty.BRKINT | tty.ICRNL | tty.INPCK | tty.ISTRIP | tty.IXON)
+    mode[tty.OFLAG] &= ~tty.OPOST
+    mode[tty.CFLAG] = (mode[tty.CFLAG] & ~(tty.CSIZE | tty.PARENB)) | tty.CS8
+    mode[tty.LFLAG] &= ~(tty.ECHO | tty.ICANON | tty.IEXTEN | tty.ISIG)
+    mode[tty.CC] = list(mode[tty.CC])
+    mode[tty.CC][tty.VMIN] = 1
+    mode[tty.CC][tty.VTIME] = 0
+    return mode
+
+
+@lru_cache(maxsize=8)
+def _long_line(cols):
+    """Pattern matching a line that wraps at *cols* columns."""
+    return re.compile("[^\n]{%d}" % max(cols - 1, 0))
+
+
 if __name__ == "__main__":
     io = ConsoleIO()
     if io.isatty():
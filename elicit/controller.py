@@ -19,9 +19,6 @@ Controller component module.
 
 __all__ = ['CommandController']
 
-import sys
-import readline
-
 from . import commands
 from . import exceptions
 from . import docopt
@@ -45,6 +42,7 @@ class CommandController:
         self._completion_scopes = {}
         self._completers = []
         self._command_list = None
+        self._method_table = None
         self._ui = commands._ui
         self.environ = self._ui.environ
 
@@ -62,7 +60,7 @@ class CommandController:
 
     # completer management methods
     def add_completion_scope(self, name, complist):
-        self._completion_scopes[name] = list(complist)
+        self._completion_scopes[name] = sorted(complist)
 
     def get_completion_scope(self, name):
         return self._completion_scopes.get(name, [])
@@ -71,12 +69,14 @@ class CommandController:
         del self._completion_scopes[name]
 
     def push_completer(self, completer):
+        import readline
         orig = readline.get_completer()
         if orig is not None:
             self._completers.append(orig)
         readline.set_completer(completer)
 
     def pop_completer(self):
+        import readline
         if self._completers:
             c = self._completers.pop()
             readline.set_completer(c)
@@ -94,8 +94,7 @@ class CommandController:
         if argv[0].startswith("#"):  # A comment
             return 0
         # ok, now fetch the real method...
-        meth = getattr(self.commands, argv[0],
-                       self.commands.default_command)
+        meth = self._get_method(argv[0])
         try:
             arguments = docopt.docopt(meth.__doc__,
                                       argv=argv[1:],
@@ -115,9 +114,8 @@ class CommandController:
                 exceptions.CommandExit,
                 KeyboardInterrupt):
             raise  # pass these through to parser
-        except:  # noqa
-            ex, val, tb = sys.exc_info()
-            self.except_hook(ex, val, tb)
+        except BaseException as err:
+            self.except_hook(type(err), err, err.__traceback__)
         else:
             if rv is not None:
                 try:
@@ -128,23 +126,18 @@ class CommandController:
             return rv
 
     def _expand_aliases(self, argv):
-        seen = {}
-        while 1:
-            alias = self.commands._aliases.get(argv[0], None)
-            if alias:
-                if alias[0] in seen:
-                    break  # alias loop
-                seen[alias[0]] = True
-                # do the substitution
-                del argv[0]
-                rl = alias[:]
-                rl.reverse()
-                for arg in rl:
-                    argv.insert(0, arg)
-            else:
-                break
+        expansion = self.commands._aliases.expand(argv[0])
+        if expansion:
+            argv[0:1] = expansion
         return argv
 
+    def _get_method(self, name):
+        if getattr(self.commands, "_dynamic_commands", False):
+            return getattr(self.commands, name, self.commands.default_command)
+        if self._method_table is None:
+            self._method_table = commands.get_command_table(self.commands)
+        return self._method_table.get(name) or self.commands.default_command
+
     def get_command_names(self):
         if self._command_list is None:
             self._command_list = commands.get_command_list(self.commands)
@@ -39,6 +39,7 @@ from . import commands
 from . import env
 from . import themes
 from . import completer
+from .fsm import FSM, ANY
 
 # Create a custom safe Repr instance and increase its maxstring.
 # The default of 30 truncates error messages too easily.
@@ -572,9 +573,8 @@ def lasti2lineno(code, lasti):
 
 class DebuggerParser(parser.CommandParser):
     def initialize(self):
-        ANY = ui.ANY
-        f = ui.FSM(0)
-        f.arg = ""
+        f = FSM(0)
+        f.arg = []
         f.add_default_transition(self._error, 0)
         # normally add text to args
         f.add_transition(ANY, 0, self._addtext, 0)
@@ -1228,7 +1228,8 @@ class DebuggerCommands(commands.BaseCommands):
             pass
 
 
-_DEFAULT_ALIASES = {
+# Shared by all debugger sessions, so aliases defined in one carry over.
+_DEFAULT_ALIASES = commands._Aliases({
     "p": ["print"],
     "l": ["list"],
     "n": ["next"],
@@ -1245,7 +1246,7 @@ _DEFAULT_ALIASES = {
     "bt": ["where"],
     "q": ["quit"],
     "/": ["search"],
-}
+})
 
 
 # Simplified interface
@@ -552,23 +552,49 @@ def docopt(doc, argv=None, help=True, version=None, options_first=False):
     """
     argv = sys.argv[1:] if argv is None else argv
 
+    usage, options, pattern = _parse_doc(doc)
+    DocoptExit.usage = usage
+    # [default] syntax for argument is disabled
+    argv = parse_argv(Tokens(argv), list(options), options_first)
+    extras(help, version, argv, doc)
+    matched, left, collected = pattern.match(argv)
+    if matched and left == []:  # better error message if left?
+        # Copy list values so callers can't alter the cached defaults.
+        return Dict((a.name, a.value[:] if type(a.value) is list else a.value)
+                    for a in (pattern.flat() + collected))
+    raise DocoptExit()
+
+
+# Parsed usage sections, keyed by doc. Docs without a valid usage section are
+# cached as the error to raise, since many commands have none.
+_parse_cache = {}
+
+
+def _parse_doc(doc):
+    try:
+        result = _parse_cache[doc]
+    except KeyError:
+        try:
+            result = _parse_usage(doc)
+        except DocoptLanguageError as err:
+            result = err
+        _parse_cache[doc] = result
+    if isinstance(result, DocoptLanguageError):
+        raise DocoptLanguageError(*result.args)
+    return result
+
+
+def _parse_usage(doc):
     usage_sections = parse_section('usage:', doc)
     if len(usage_sections) == 0:
         raise DocoptLanguageError('"usage:" (case-insensitive) not found.')
     if len(usage_sections) > 1:
         raise DocoptLanguageError('More than one "usage:" (case-insensitive).')
-    DocoptExit.usage = usage_sections[0]
-
+    usage = usage_sections[0]
     options = parse_defaults(doc)
-    pattern = parse_pattern(formal_usage(DocoptExit.usage), options)
-    # [default] syntax for argument is disabled
-    argv = parse_argv(Tokens(argv), list(options), options_first)
+    pattern = parse_pattern(formal_usage(usage), options)
     pattern_options = set(pattern.flat(Option))
     for options_shortcut in pattern.flat(OptionsShortcut):
         doc_options = parse_defaults(doc)
         options_shortcut.children = list(set(doc_options) - pattern_options)
-    extras(help, version, argv, doc)
-    matched, left, collected = pattern.fix().match(argv)
-    if matched and left == []:  # better error message if left?
-        return Dict((a.name, a.value) for a in (pattern.flat() + collected))
-    raise DocoptExit()
+    return usage, options, pattern.fix()
@@ -18,11 +18,14 @@
 __all__ = ['Environ']
 
 import os
+from operator import itemgetter
 
 import re
 _var_re = re.compile(r'\$([a-zA-Z0-9_\?]+|\{[^}]*\})')
 del re
 
+_first = itemgetter(0)
+
 
 class Environ(dict):
     """Environ is a dictionary-like object that does automatic variable
@@ -65,32 +68,23 @@ class Environ(dict):
         return name
 
     def __str__(self):
-        s = ["%s=%s" % (nv[0], nv[1]) for nv in self.items()]
-        s.sort()
-        return "\n".join(s)
+        return "\n".join(f"{name}={value}" for name, value in sorted(self.items(), key=_first))
 
     def expand(self, value):
         """Pass in a string that might have variable expansion to be performed
         (e.g. a section that has $NAME embedded), and return the expanded
         string.
         """
-        i = 0
-        while 1:
-            m = _var_re.search(value, i)
-            if not m:
-                return value
-            i, j = m.span(0)
-            vname = m.group(1)
-            if vname[0] == '{':
-                vname = vname[1:-1]
-            tail = value[j:]
-            tv = self.get(vname)
-            if tv is not None:  # exand to empty if not found or val is None
-                value = value[:i] + str(tv)
-            else:
-                value = value[:i]
-            i = len(value)
-            value = value + tail
+        if "$" not in value:
+            return value
+        return _var_re.sub(self._lookup, value)
+
+    def _lookup(self, match):
+        vname = match.group(1)
+        if vname[0] == '{':
+            vname = vname[1:-1]
+        tv = self.get(vname)
+        return "" if tv is None else str(tv)  # empty if not found or val is None
 
     def copy(self):
         return Environ(self)
@@ -27,7 +27,7 @@ class FSM:
     ANY = ANY
 
     def __init__(self, initial_state=0):
-        self._transitions = {}   # Map (input_symbol, state) to (action, next_state).
+        self._transitions = {}   # Map state to {input_symbol: (action, next_state)}.
         self.default_transition = None
         self.RESET = initial_state
         self.initial_state = self.RESET
@@ -53,24 +53,22 @@ class FSM:
             self.default_transition = (action, next_state)
 
     def add_transition(self, input_symbol, state, action, next_state):
-        self._transitions[(input_symbol, state)] = (action, next_state)
+        self._transitions.setdefault(state, {})[input_symbol] = (action, next_state)
 
     def add_transitions(self, symbols, state, action, next_state):
         for c in symbols:
             self.add_transition(c, state, action, next_state)
 
     def get_transition(self, input_symbol, state):
-        try:
-            return self._transitions[(input_symbol, state)]
-        except KeyError:
-            try:
-                return self._transitions[(ANY, state)]
-            except KeyError:
-                # no expression matched, so check for default
-                if self.default_transition is not None:
-                    return self.default_transition
-                else:
-                    raise FSMError('Transition {!r} is undefined.'.format(input_symbol))
+        symbols = self._transitions.get(state)
+        if symbols is not None:
+            transition = symbols.get(input_symbol) or symbols.get(ANY)
+            if transition is not None:
+                return transition
+        # no expression matched, so check for default
+        if self.default_transition is not None:
+            return self.default_transition
+        raise FSMError('Transition {!r} is undefined.'.format(input_symbol))
 
     def process(self, input_symbol):
         action, next_state = self.get_transition(input_symbol, self.current_state)
@@ -80,8 +78,13 @@ class FSM:
             self.current_state = next_state
 
     def process_string(self, s):
+        get_transition = self.get_transition
         for c in s:
-            self.process(c)
+            action, next_state = get_transition(c, self.current_state)
+            if action is not None:
+                action(c, self)
+            if next_state is not None:
+                self.current_state = next_state
 
 
 if __name__ == "__main__":
@@ -17,12 +17,39 @@ __all__ = ['CommandParser']
 
 import sys
 import os
+import re
 import readline
 
 from . import exceptions
 from . import controller
+from .completer import get_prefixed
 from .fsm import FSM, ANY
 
+# A shell variable reference, $NAME or ${NAME}. A bare name must be followed
+# by some other character so we know it is complete.
+_VARIABLE = r"\$[A-Za-z0-9_?]*(?:\{[^}]*\}|(?=[^A-Za-z0-9_?{]))"
+
+# Tokenizes complete constructs in the top-level parser state. Anything not
+# matched here (unterminated quotes, or a variable or escape at the end of the
+# text) is left to the FSM.
+_SCANNER = re.compile(r"""
+    (?P<space>[ \t]+)
+  | (?P<doit>[;\n])
+  | '(?P<squote>[^']*)'
+  | "(?P<dquote>[^"\\$']*(?:(?:\\.|'[^']*'|{var})[^"\\$']*)*)"
+  | (?P<var>{var})
+  | (?P<escape>(?:\\.)+)
+  | (?P<text>[^ \t;\n'"\\$]+)
+""".format(var=_VARIABLE), re.S | re.X)
+
+# Tokenizes the body of a double-quoted string already matched above.
+_DQ_SCANNER = re.compile(r"""
+    (?P<text>[^\\$']+)
+  | (?P<escape>(?:\\.)+)
+  | '(?P<squote>[^']*)'
+  | (?P<var>\$[A-Za-z0-9_?]*(?:\{[^}]*\}|(?![A-Za-z0-9_?{])))
+""", re.S | re.X)
+
 
 class CommandParser:
     """Reads an IO stream and parses input similar to POSIX shell syntax.
@@ -31,6 +58,9 @@ class CommandParser:
 
     VARCHARS = r'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_?'
     _SPECIAL = {"r": "\r", "n": "\n", "t": "\t", "b": "\b"}
+    _SPECIAL_TABLE = str.maketrans(_SPECIAL)
+    _scanner = None  # Subclasses with their own grammar use only the FSM.
+    _reprocess = False
 
     def __init__(self, controller=None, historyfile=None):
         if historyfile:
@@ -54,11 +84,8 @@ class CommandParser:
             else:  # complete based on scope keyed on previous word
                 word = curr[:b].split()[-1]
                 complist = self._controller.get_completion_scope(word)
-            self._complist = [s for s in complist if s.startswith(text)]
-        try:
-            return self._complist[state]
-        except IndexError:
-            return None
+            self._complist = tuple(get_prefixed(complist, text))
+        return self._complist[state] if state < len(self._complist) else None
 
     def close(self):
         self.reset()
@@ -71,7 +98,7 @@ class CommandParser:
         self._controllers = []
         self._controller = None
         self.arg_list = []
-        self._buf = ""
+        self._varcache = {}
         if newcontroller:
             self.push_controller(newcontroller)
 
@@ -102,11 +129,22 @@ class CommandParser:
         finally:
             fo.close()
 
-    def parse_file(self, fo):
-        data = fo.read(4096)
+    def parse_file(self, fo, blocksize=65536):
+        # Feed whole lines so that the scanner, rather than the FSM, sees
+        # complete constructs; only a line that spans blocks is carried over.
+        tail = ""
+        data = fo.read(blocksize)
         while data:
-            self.feed(data)
-            data = fo.read(4096)
+            data = tail + data
+            end = data.rfind("\n") + 1
+            if end:
+                self.feed(data[:end])
+                tail = data[end:]
+            else:
+                tail = data
+            data = fo.read(blocksize)
+        if tail:
+            self.feed(tail)
 
     def interact(self):
         _reset_readline()
@@ -133,28 +171,36 @@ class CommandParser:
                 readline.write_history_file(self._historyfile)
 
     def feed(self, text):
-        text = self._buf + text
+        self._varcache.clear()
+        fsm = self._fsm
+        scan = self._scanner.match if self._scanner is not None else None
         i = 0
-        for c in text:
-            i += 1
+        ld = len(text)
+        while i < ld:
             try:
-                self._fsm.process(c)
-                while self._fsm.stack:
-                    self._fsm.process(self._fsm.pop())
+                m = None if (fsm.current_state or scan is None) else scan(text, i)
+                if m is None:  # inside, or at the start of, an incomplete construct
+                    c = text[i]
+                    i += 1
+                    fsm.process(c)
+                    if self._reprocess:  # the action handed the character back
+                        self._reprocess = False
+                        i -= 1
+                else:
+                    i = m.end()
+                    kind = m.lastgroup
+                    self._actions[kind](m.group(kind), fsm)
             except EOFError:
                 self.pop_controller()
-            except exceptions.CommandQuit:
-                val = sys.exc_info()[1]
+            except exceptions.CommandQuit as val:
                 self.pop_controller(val.value)
             except exceptions.NewCommand as cmdex:
                 self.push_controller(controller.CommandController(cmdex.value))
-        if self._fsm.current_state:  # non-zero, stuff left
-            self._buf = text[i:]
-        return self._fsm.current_state
+        return fsm.current_state
 
     def initialize(self):
         f = FSM(0)
-        f.arg = ""
+        f.arg = []  # pieces of the current argument
         f.add_default_transition(self._error, 0)
         # normally add text to args
         f.add_transition(ANY, 0, self._addtext, 0)
@@ -193,6 +239,16 @@ class CommandParser:
         f.add_transition("'", 5, self._singlequote, 3)
         f.add_transition(ANY, 5, self._addtext, 5)
         self._fsm = f
+        self._scanner = _SCANNER
+        self._actions = {
+            "space": self._wordbreak,
+            "doit": self._doit,
+            "squote": self._scan_singlequote,
+            "dquote": self._scan_doublequote,
+            "var": self._expandvar,
+            "escape": self._scan_escapes,
+            "text": self._addtext,
+        }
 
     def _startvar(self, c, fsm):
         fsm.varname = c
@@ -203,47 +259,83 @@ class CommandParser:
     def _endvar(self, c, fsm):
         if c == "}":
             fsm.varname += c
-        else:
-            fsm.push(c)
+        else:  # c terminates the name and is read again in the new state
+            self._reprocess = True
+        self._expandvar(fsm.varname, fsm)
+
+    def _expandvar(self, varname, fsm):
+        # Expansions are remembered until the next command runs, since only
+        # commands change the environment.
+        try:
+            fsm.arg.append(self._varcache[varname])
+            return
+        except KeyError:
+            pass
         try:
-            val = self._controller.environ.expand(fsm.varname) or ""
-        except:  # noqa
-            ex, val, tb = sys.exc_info()
+            val = self._controller.environ.expand(varname) or ""
+        except BaseException as err:
             self._controller._ui.error("Could not expand variable "
-                                       "{!r}: {} ({})".format(fsm.varname, ex, val))
+                                       "{!r}: {} ({})".format(varname, type(err), err))
         else:
             if val is not None:
-                fsm.arg += str(val)
+                val = str(val)
+                if len(self._varcache) >= 32:
+                    self._varcache.clear()
+                self._varcache[varname] = val
+                fsm.arg.append(val)
 
     def _error(self, input_symbol, fsm):
         self._controller._ui.error('Syntax error: {}\n{!r}'.format(input_symbol, fsm.stack))
         fsm.reset()
 
     def _addtext(self, c, fsm):
-        fsm.arg += c
+        fsm.arg.append(c)
+
+    def _takearg(self, fsm):
+        arg = "".join(fsm.arg)
+        fsm.arg = []
+        return arg
 
     def _wordbreak(self, c, fsm):
-        if fsm.arg:
-            self.arg_list.append(fsm.arg)
-            fsm.arg = ''
+        arg = self._takearg(fsm)
+        if arg:
+            self.arg_list.append(arg)
 
     def _slashescape(self, c, fsm):
-        fsm.arg += CommandParser._SPECIAL.get(c, c)
+        fsm.arg.append(c.translate(CommandParser._SPECIAL_TABLE))
 
     def _singlequote(self, c, fsm):
-        self.arg_list.append(fsm.arg)
-        fsm.arg = ''
+        self.arg_list.append(self._takearg(fsm))
 
     def _doublequote(self, c, fsm):
-        self.arg_list.append(fsm.arg)
-        fsm.arg = ''
+        self.arg_list.append(self._takearg(fsm))
+
+    def _scan_escapes(self, text, fsm):
+        # text is a run of backslash-character pairs.
+        fsm.arg.append(text[1::2].translate(CommandParser._SPECIAL_TABLE))
+
+    def _scan_singlequote(self, text, fsm):
+        fsm.arg.append(text)
+        self._singlequote("'", fsm)
+
+    def _scan_doublequote(self, text, fsm):
+        for m in _DQ_SCANNER.finditer(text):
+            kind = m.lastgroup
+            if kind == "text":
+                fsm.arg.append(m.group(kind))
+            elif kind == "escape":
+                self._scan_escapes(m.group(kind), fsm)
+            elif kind == "squote":
+                self._scan_singlequote(m.group(kind), fsm)
+            else:
+                self._expandvar(m.group(kind), fsm)
+        self._doublequote('"', fsm)
 
     def _doit(self, c, fsm):
-        if fsm.arg:
-            self.arg_list.append(fsm.arg)
-            fsm.arg = ''
+        self._wordbreak(c, fsm)
         args = self.arg_list
         self.arg_list = []
+        self._varcache.clear()
         self._controller.call(args)
 
 
@@ -13,9 +13,11 @@ import base64
 import signal
 import tempfile
 import builtins
+import threading
 import textwrap
 import readline
 import subprocess
+from functools import lru_cache
 
 from elicit import colors
 from elicit import debugger
@@ -26,63 +28,106 @@ __all__ = ['imgcat', 'divider', 'cowsay', 'dedent', 'error', 'head', 'warning',
            'clear', 'print_url', 'URL', 'open_resource', 'SlideController']
 
 
-WIDTH = LINES = _text_wrapper = _bullet_wrapper = _old_handler = PWD = None
+WIDTH = LINES = PWD = None
+_size_changed = True
+
+_text_wrapper = textwrap.TextWrapper(initial_indent=" " * 4,
+                                     subsequent_indent=" " * 4,
+                                     replace_whitespace=True)
+_bullet_wrapper = textwrap.TextWrapper(initial_indent=" " * 4,
+                                       subsequent_indent=" " * 6,
+                                       replace_whitespace=True)
 
 
 def _reset_size(sig, tr):
-    global WIDTH, LINES, _text_wrapper, _bullet_wrapper, _old_handler
+    # A drag-resize sends a stream of signals, so only note the change here.
+    # The size is read again by _update_size when something is drawn.
+    global _size_changed
+    _size_changed = True
+    _old_handler(sig, tr)
+
+
+def _no_handler(sig, tr):
+    pass
+
+
+def _update_size():
+    global WIDTH, LINES, _size_changed
+    if not _size_changed:
+        return
+    _size_changed = False
     try:
         WIDTH, LINES = os.get_terminal_size()
     except OSError:
         WIDTH, LINES = 80, 24
-    _text_wrapper = textwrap.TextWrapper(width=WIDTH - 10,
-                                         initial_indent=" " * 4,
-                                         subsequent_indent=" " * 4,
-                                         replace_whitespace=True,
-                                         max_lines=LINES - 4)
-    _bullet_wrapper = textwrap.TextWrapper(width=WIDTH - 10,
-                                           initial_indent=" " * 4,
-                                           subsequent_indent=" " * 6,
-                                           replace_whitespace=True,
-                                           max_lines=LINES - 4)
-    if callable(_old_handler):
-        _old_handler(sig, tr)
-
-
-_reset_size(signal.SIGWINCH, None)
-_old_handler = signal.signal(signal.SIGWINCH, _reset_size)
+    # Only the size changes, so adjust the wrappers rather than replace them.
+    for wrapper in (_text_wrapper, _bullet_wrapper):
+        wrapper.width = WIDTH - 10
+        wrapper.max_lines = LINES - 4
+
+
+_update_size()
+_old_handler = signal.getsignal(signal.SIGWINCH)
+if not callable(_old_handler):  # SIG_DFL, SIG_IGN or None: nothing to chain to
+    _old_handler = _no_handler
+signal.signal(signal.SIGWINCH, _reset_size)
 
 clear = colors.clear
 
 
 def xterm_divider():
-    lines = os.get_terminal_size().columns - 6
-    line = '  ◀' + '═' * lines + '▶\n'
-    sys.stdout.write(line)
+    _update_size()
+    sys.stdout.write(_xterm_divider_line(WIDTH))
+
+
+@lru_cache(maxsize=8)
+def _xterm_divider_line(columns):
+    return '  ◀' + '═' * (columns - 6) + '▶\n'
+
+
+@lru_cache(maxsize=4)
+def _iterm_divider_bytes(pwd):
+    img = _read_resource(pwd, "separator-1.png")
+    return (b'\x1b]1337;File=inline=1;width=100%;height=1;preserveAspectRatio=0:' +
+            base64.b64encode(img) + b'\x07')
 
 
 def iterm_divider():
-    img = get_resource("separator-1.png")
-    sys.stdout.buffer.write(
-        b'\x1b]1337;File=inline=1;width=100%;height=1;preserveAspectRatio=0:' +
-        base64.b64encode(img) + b'\x07')
+    sys.stdout.buffer.write(_iterm_divider_bytes(PWD))
 
 
 def xterm_imgcat(imgdata):
+    _update_size()
+    sys.stdout.write(_img2txt(imgdata, WIDTH - 20))
+    sys.stdout.flush()
+
+
+@lru_cache(maxsize=16)
+def _img2txt(imgdata, width):
+    # Rendering runs an external program, so remember the text for slides
+    # that are shown again.
     fd, name = tempfile.mkstemp(suffix=".png")
     os.write(fd, imgdata)
     os.close(fd)
     # img2txt is from the caca-utils package
-    cmd = ["img2txt", "-f", "utf8", "-W", str(WIDTH - 20), name]
+    cmd = ["img2txt", "-f", "utf8", "-W", str(width), name]
     try:
-        subprocess.call(cmd)
+        out = subprocess.run(cmd, stdout=subprocess.PIPE).stdout
     finally:
         os.unlink(name)
+    return out.decode("utf-8", "replace")
 
 
-def iterm_imgcat(imgdata):
-    sys.stdout.buffer.write(b'\x1b]1337;File=inline=1:' +
-                            base64.b64encode(imgdata) + b'\x07\n')
+def iterm_imgcat(imgdata, chunksize=3 * 65536):
+    # Encode in multiples of three bytes, so the pieces need no padding and
+    # join up to the same base64 text without holding all of it at once.
+    out = sys.stdout.buffer
+    out.write(b'\x1b]1337;File=inline=1:')
+    data = memoryview(imgdata)
+    for start in range(0, len(data), chunksize):
+        out.write(base64.b64encode(data[start:start + chunksize]))
+    out.write(b'\x07\n')
+    out.flush()
 
 
 def iterm_print_url(text, url):
@@ -115,84 +160,100 @@ def print_image(imgname):
 
 
 def head(line):
-    colors.white(line.center(WIDTH - 2))
-    print("\n")
+    _update_size()
+    sys.stdout.write(f"{colors.WHITE}{line.center(WIDTH - 2)}{colors.RESET}\n\n")
 
 
 def para(text):
-    print(_text_wrapper.fill(dedent(text)))
-    print()
+    _update_size()
+    print(_text_wrapper.fill(dedent(text)), end="\n\n")
 
 
 def bullet(text):
+    _update_size()
     print(_bullet_wrapper.fill(f"{colors.WHITE}• {colors.NORMAL}" + dedent(text)))
 
 
-def cowsay(text):
-    colors.box(text, 2, color=colors.GREEN)
-    print(r"""        \   ^__^
+_COW = r"""        \   ^__^
          \  (oo)\_______
             (__)\       )\/\
                 ||----w |
                 ||     ||
-""")
+
+"""
+
+
+def cowsay(text):
+    sys.stdout.write(colors.boxed(text, 2, color=colors.GREEN) + _COW)
 
 
 _DEDENT_RE = re.compile(r'\n([ \t]+)')
 
 
+@lru_cache(maxsize=128)
 def dedent(text):
+    if "\n " not in text and "\n\t" not in text:  # nothing indented
+        return text
     return _DEDENT_RE.sub(r" ", text)
 
 
-def error(text):
-    colors.box(text, 2, color=colors.RED)
-    print(r"""   \   ,__,
+_BULL = r"""   \   ,__,
     \  (oo)____
        (__)    )\
           ||--|| *
-""")
 
+"""
 
-def warning(text):
-    colors.box(text, 2, color=colors.YELLOW)
-    print(r"""  \
+_BOMB = r"""  \
    \   \
         \ /\
         ( )
       .( o ).
-""")
+
+"""
+
+
+def error(text):
+    sys.stdout.write(colors.boxed(text, 2, color=colors.RED) + _BULL)
+
+
+def warning(text):
+    sys.stdout.write(colors.boxed(text, 2, color=colors.YELLOW) + _BOMB)
 
 
 def get_resource(name):
-    fn = os.path.join(PWD, "data", name)
+    return _read_resource(PWD, name)
+
+
+@lru_cache(maxsize=32)
+def _read_resource(pwd, name):
+    # Keyed on the presentation directory too, in case init() changes it.
+    fn = os.path.join(pwd, "data", name)
     if not os.path.exists(fn):
         fn = os.path.join(os.path.dirname(__file__), "data", name)
     if not os.path.exists(fn):
         raise ValueError("Resource not found.")
-    return open(fn, "rb").read()
+    with open(fn, "rb") as fo:
+        return fo.read()
 
 
 class DisplayHook:
 
     def __init__(self, textstream):
         self.stream = textstream
+        self._write = textstream.write
 
     def __call__(self, value):
         if value is None:
             return
-        _ = builtins._
         builtins._ = None
-        if value is None:
-            builtins._ = _
-            return
         text = repr(value)
         try:
-            self.stream.write(text)
+            self._write(text + "\n")
         except UnicodeEncodeError:
             bs = text.encode(self.stream.encoding, 'backslashreplace')
             self.stream.buffer.write(bs)
-        self.stream.write("\n")
+            self._write("\n")
         builtins._ = value
 
 
@@ -208,6 +269,12 @@ def debugger_hook(exc, value, tb):
 
 
 class SlideController:
+    """Steps through a list of page callables.
+
+    A page may list the resource names it uses in a *resources* attribute.
+    Those of the following page are then read in the background while the
+    current one is shown.
+    """
 
     def __init__(self, pages):
         self.pages = pages
@@ -217,6 +284,7 @@ class SlideController:
         page = self.pages[self._page_i]
         page()
         self._page_i = (self._page_i + 1) % len(self.pages)
+        _prefetch(self.pages[self._page_i])
 
     def prevpage(self):
         self._page_i = (self._page_i - 2) % len(self.pages)
@@ -229,6 +297,21 @@ class SlideController:
         page()
 
 
+def _prefetch(page):
+    names = getattr(page, "resources", None)
+    if names:
+        threading.Thread(target=_load_resources, args=(PWD, tuple(names)),
+                         daemon=True).start()
+
+
+def _load_resources(pwd, names):
+    for name in names:
+        try:
+            _read_resource(pwd, name)
+        except (ValueError, OSError):
+            pass  # reported when the page itself asks for it
+
+
 class PresoObject:
 
     def __init__(self, cls, text):
@@ -16,10 +16,8 @@ class PythonMixin:
 
     def _get_ns(self):
         if hasattr(self, "_obj"):
-            try:
-                name = self._obj.__class__.__name__.split(".")[-1].lower()
-            except:  # noqa
-                name = "object"
+            cls = getattr(self._obj, "__class__", None)
+            name = getattr(cls, "__name__", "object").rsplit(".", 1)[-1].lower()
             return {name: self._obj, "environ": self._environ}
         else:
             return globals()
@@ -19,23 +19,89 @@ input from a shell.
 
 import sys
 import os
-from itertools import zip_longest
+import re
+import shlex
+import signal
+import tempfile
+import subprocess
+from itertools import islice
 from ast import literal_eval
 
-
 try:
     COLUMNS, LINES = os.get_terminal_size()
 except OSError:
     COLUMNS, LINES = 80, 24
 
+_size_changed = True
+_old_winch = None
+_watching = False  # whether _on_winch is installed
+
+
+def _on_winch(sig, frame):
+    global _size_changed
+    _size_changed = True  # looked up again when next needed
+    if callable(_old_winch):
+        _old_winch(sig, frame)
+
+
+def _watch_resize():
+    # Handlers can only be set from the main thread, and not all platforms
+    # have SIGWINCH. Until one is installed the size is queried every time.
+    global _old_winch, _watching
+    if not hasattr(signal, "SIGWINCH"):
+        return
+    try:
+        _old_winch = signal.signal(signal.SIGWINCH, _on_winch)
+    except ValueError:  # not the main thread
+        return
+    _watching = True
+
+
+def _termsize():
+    """Return the terminal (columns, lines), querying only after a resize."""
+    global COLUMNS, LINES, _size_changed
+    if not _watching:
+        _watch_resize()
+    if _size_changed or not _watching:
+        _size_changed = False
+        try:
+            COLUMNS, LINES = os.get_terminal_size()
+        except OSError:
+            COLUMNS, LINES = 80, 24
+    return COLUMNS, LINES
+
+
+def _with_termsize(columns, lines):
+    """Fill in a columns or lines argument left as None."""
+    cols, rows = _termsize()
+    return (cols if columns is None else columns), (rows if lines is None else lines)
+
 
 def default_error(text):
     print(text, file=sys.stderr)
 
 
+_readline_checked = False
+
+
+def _load_readline():
+    # readline gives input() line editing and history. Loaded on the first
+    # prompt, and only for a terminal, so that importing this module (and
+    # elicit.ui) does not initialize it for non-interactive users.
+    global _readline_checked
+    if not _readline_checked:
+        _readline_checked = True
+        if sys.stdin.isatty():
+            try:
+                import readline  # noqa: F401
+            except ImportError:
+                pass
+
+
 def get_text(prompt="", msg=None, input=input):
     """Prompt user to enter multiple lines of text."""
 
+    _load_readline()
     print((msg or "Enter text.") + " End with ^D or a '.' as first character.")
     lines = []
     while True:
@@ -51,6 +117,7 @@ def get_text(prompt="", msg=None, input=input):
 
 def get_input(prompt="", default=None, input=input):
     """Get user input with an optional default value."""
+    _load_readline()
     if default is not None:
         ri = input("{} [{}]> ".format(prompt, default))
         if not ri:
@@ -61,17 +128,50 @@ def get_input(prompt="", default=None, input=input):
         return input("{}> ".format(prompt))
 
 
+# Plain scalar literals that int() and float() read exactly as literal_eval
+# does. Anything else (other bases, underscores, leading zeros, expressions)
+# is left to literal_eval.
+_INT_RE = re.compile(r"[ \t]*[-+]?(?:0|[1-9][0-9]*)[ \t]*\Z")
+_FLOAT_RE = re.compile(r"""[ \t]*[-+]?
+    (?:[0-9]+\.[0-9]*(?:[eE][-+]?[0-9]+)?
+      | \.[0-9]+(?:[eE][-+]?[0-9]+)?
+      | [0-9]+[eE][-+]?[0-9]+)
+    [ \t]*\Z""", re.X)
+_BOOLS = {"True": True, "False": False}
+
+
+def _parse_int(text):
+    return int(text) if _INT_RE.match(text) else literal_eval(text)
+
+
+def _parse_float(text):
+    return float(text) if _FLOAT_RE.match(text) else literal_eval(text)
+
+
+def _parse_bool(text):
+    try:
+        return _BOOLS[text.strip(" \t")]
+    except KeyError:
+        return literal_eval(text)
+
+
+_PARSERS = {int: _parse_int, float: _parse_float, bool: _parse_bool}
+
+
 def get_type(atype, prompt="", default=None, input=input, error=default_error):
     """Get user input of a particular base type."""
+    _load_readline()
+    parse = _PARSERS.get(atype, literal_eval)
+    if default is not None:
+        prompt = "{} [{}]> ".format(prompt, default)
+    else:
+        prompt = "{}> ".format(prompt)
     while 1:
-        if default is not None:
-            text = input("{} [{}]> ".format(prompt, default))
-            if not text:
-                return default
-        else:
-            text = input("{}> ".format(prompt))
+        text = input(prompt)
+        if not text and default is not None:
+            return default
         try:
-            val = literal_eval(text)
+            val = parse(text)
         except (SyntaxError, ValueError):
             error("Error in input. Please enter a {} value.".format(atype.__name__))
             continue
@@ -102,14 +202,16 @@ def get_list(prompt="", default=None, input=input, error=default_error):
 
 
 def choose(somelist, defidx=0, prompt="choose", input=input, error=default_error,
-           lines=LINES, columns=COLUMNS):
+           lines=None, columns=None):
     """Select an item from a list. Returns the object selected from the
     list index.
     """
-    assert len(list(somelist)) > 0, "list to choose from has no elements!"
-    print_menu_list(somelist, lines=lines, columns=columns)
+    if not len(somelist):
+        raise ValueError("list to choose from has no elements!")
     defidx = int(defidx)
-    assert defidx >= 0 and defidx < len(somelist), "default index out of range."
+    if not 0 <= defidx < len(somelist):
+        raise ValueError("default index out of range.")
+    print_menu_list(somelist, lines=lines, columns=columns, input=input)
     while 1:
         try:
             ri = get_input(prompt, defidx + 1, input)  # menu list starts at one
@@ -130,16 +232,16 @@ def choose(somelist, defidx=0, prompt="choose", input=input, error=default_error
 
 def choose_multiple(somelist, chosen=None, prompt="choose multiple",
                     input=input, error=default_error,
-                    lines=LINES, columns=COLUMNS):
+                    lines=None, columns=None):
     somelist = somelist[:]
     if chosen is None:
         chosen = []
     while 1:
         print("Choose from list. Enter to end, negative index removes from chosen.")
-        print_menu_list(somelist, lines=lines, columns=columns)
+        print_menu_list(somelist, lines=lines, columns=columns, input=input)
         if chosen:
             print("You have: ")
-            print_menu_list(chosen, lines=lines, columns=columns)
+            print_menu_list(chosen, lines=lines, columns=columns, input=input)
         try:
             ri = get_input(prompt, None, input)  # menu list starts at one
         except EOFError:
@@ -170,11 +272,11 @@ def choose_multiple(somelist, chosen=None, prompt="choose multiple",
 
 
 def choose_value(somemap, default=None, prompt="choose", input=input, error=default_error,
-                 lines=LINES, columns=COLUMNS):
+                 lines=None, columns=None):
     """Select an item from a mapping. Keys are indexes that are selected.
     Returns the value of the mapping key selected.
     """
-    first = print_menu_map(somemap, lines=lines, columns=columns)
+    first = print_menu_map(somemap, lines=lines, columns=columns, input=input)
     while 1:
         try:
             ri = get_input(prompt, default, input)
@@ -195,11 +297,11 @@ def choose_value(somemap, default=None, prompt="choose", input=input, error=defa
 
 
 def choose_key(somemap, default=0, prompt="choose", input=input, error=default_error,
-               lines=LINES, columns=COLUMNS):
+               lines=None, columns=None):
     """Select a key from a mapping.
     Returns the key selected.
     """
-    keytype = type(print_menu_map(somemap, lines=lines, columns=columns))
+    keytype = type(print_menu_map(somemap, lines=lines, columns=columns, input=input))
     while 1:
         try:
             userinput = get_input(prompt, default, input)
@@ -220,7 +322,7 @@ def choose_key(somemap, default=0, prompt="choose", input=input, error=default_e
 
 def choose_multiple_from_map(somemap, chosen=None, prompt="choose multiple",
                              input=input, error=default_error,
-                             lines=LINES, columns=COLUMNS):
+                             lines=None, columns=None):
     """Choose multiple items from a mapping.
     Returns a mapping of items chosen. Type in the key to select the values.
     """
@@ -230,13 +332,13 @@ def choose_multiple_from_map(somemap, chosen=None, prompt="choose multiple",
     while 1:
         print("Choose from list. Enter to end, negative index removes from chosen.")
         if somemap:
-            first = print_menu_map(somemap, lines=lines, columns=columns)
+            first = print_menu_map(somemap, lines=lines, columns=columns, input=input)
         else:
             print("(You have selected all possible choices.)")
             first = 0
         if chosen:
             print("You have: ")
-            print_menu_map(chosen, lines=lines, columns=columns)
+            print_menu_map(chosen, lines=lines, columns=columns, input=input)
         try:
             ri = get_input(prompt, None, input)  # menu list starts at one
         except EOFError:
@@ -266,23 +368,20 @@ def choose_multiple_from_map(somemap, chosen=None, prompt="choose multiple",
 
 def print_list(clist, indent=0, width=74):
     indent = min(max(indent, 0), width - 1)
-    if indent:
-        print(" " * indent, end="")
+    pad = " " * indent
+    parts = [pad]
     col = indent + 2
     for c in clist[:-1]:
         ps = str(c) + ","
         col = col + len(ps) + 1
         if col > width:
-            print()
+            parts.append("\n" + pad)
             col = indent + len(ps) + 1
-            if indent:
-                print(" " * indent, end="")
-        print(ps, end="")
+        parts.append(ps)
     if col + len(clist[-1]) > width:
-        print()
-        if indent:
-            print(" " * indent, end="")
-    print(clist[-1])
+        parts.append("\n" + pad)
+    parts.append(str(clist[-1]))
+    print("".join(parts))
 
 
 def yes_no(prompt, default=True, input=input):
@@ -292,12 +391,13 @@ def yes_no(prompt, default=True, input=input):
 
 def edit_text(text, prompt="Edit text"):
     """Run $EDITOR on text. Defaults to vim."""
-    fname = os.path.join(os.environ["HOME"], ".edit_text.txt")
-    with open(fname, "w") as fo:
-        fo.write(prompt + ":\n")
-        fo.write(text)
-    os.system('%s "%s"' % (os.environ.get("EDITOR", "/usr/bin/vim"), fname))
+    fd, fname = tempfile.mkstemp(prefix="edit_text", suffix=".txt")
     try:
+        with open(fd, "w") as fo:
+            fo.write(prompt + ":\n")
+            fo.write(text)
+        editor = shlex.split(os.environ.get("EDITOR", "/usr/bin/vim"))
+        subprocess.call(editor + [fname])
         with open(fname, "r") as fo:
             text = fo.read()
     finally:
@@ -305,50 +405,84 @@ def edit_text(text, prompt="Edit text"):
     return text[text.find("\n") + 1:]  # chop first line.
 
 
-def print_menu_list(clist, lines=LINES, columns=COLUMNS):
+def print_menu_list(clist, lines=None, columns=None, input=None):
     """Print a list with leading numeric menu choices.
 
-    Use two columns if wide terminal.
+    Use two columns if wide terminal. If an *input* function is given, and
+    output is to a terminal, pause after each screenful.
     """
-    fmt = "{{:3d}}: {{:{cols}.{cols}}}".format(cols=columns - 6)
+    columns, lines = _with_termsize(columns, lines)
+    width, start = columns - 6, 7 - columns  # keep the tail of long items
     if columns > 80:
-        fmt2 = "{{:3d}}: {{:{cols}.{cols}}} | {{:3d}}: {{:{cols}.{cols}}}".format(
-            cols=(columns - 14) // 2)
-        h = (len(clist) + 1) // 2
-        i1, i2 = 1, h + 1
-        for c1, c2 in zip_longest(clist[:h], clist[h:]):
-            if c2:
-                print(fmt2.format(i1, str(c1)[-(columns // 2) + 7:], i2,
-                      str(c2)[-(columns // 2) + 7:]))
-            else:
-                print(fmt.format(i1, str(c1)[-columns + 7:]))
-            i1 += 1
-            i2 += 1
+        width2, start2 = (columns - 14) // 2, 7 - columns // 2
+        n = len(clist)
+        h = (n + 1) // 2
+        # Index both halves in place rather than slicing copies of them.
+        rows = (f"{i + 1:3d}: {_menu_cell(clist[i], start2, width2)} | "
+                f"{i + h + 1:3d}: {_menu_cell(clist[i + h], start2, width2)}"
+                if i + h < n and clist[i + h] else
+                f"{i + 1:3d}: {_menu_cell(clist[i], start, width)}"
+                for i in range(h))
     else:
-        for i, c1 in enumerate(clist):
-            print(fmt.format(i + 1, str(c1)[-columns + 7:]))
+        h = len(clist)
+        rows = (f"{i:3d}: {_menu_cell(c1, start, width)}" for i, c1 in enumerate(clist, 1))
+    _print_rows(rows, h, lines, input)
+
 
+def _menu_cell(item, start, width):
+    """Same as formatting str(item)[start:] with "{:width.width}"."""
+    return str(item)[start:][:width].ljust(width)
 
-def print_menu_map(mapping, lines=LINES, columns=COLUMNS):
-    """Print a list with leading numeric menu choices. Use two columns if necessary."""
+
+def print_menu_map(mapping, lines=None, columns=None, input=None):
+    """Print a list with leading numeric menu choices. Use two columns if necessary.
+
+    Pages like print_menu_list when given an *input* function.
+    """
+    columns, lines = _with_termsize(columns, lines)
     keys = sorted(mapping.keys())
     first = keys[0]
-    fmt = "{{!s:>4s}}: {{:{cols}.{cols}}}".format(cols=columns - 6)
+    fmt = "{{!s:>4s}}: {{:{cols}.{cols}}}".format(cols=columns - 6).format
     if columns > 80:
         fmt2 = "{{!s:>4s}}: {{:{cols}.{cols}}} | {{!s:>4s}}: {{:{cols}.{cols}}}".format(
-            cols=(columns - 16) // 2)
-        h = (len(mapping) + 1) // 2
-        for k1, k2 in zip_longest(keys[:h], keys[h:]):
-            if k2 is not None:
-                print(fmt2.format(k1, mapping[k1], k2, mapping[k2]))
-            else:
-                print(fmt.format(k1, mapping[k1]))
+            cols=(columns - 16) // 2).format
+        n = len(keys)
+        h = (n + 1) // 2
+        rows = (fmt2(keys[i], mapping[keys[i]], keys[i + h], mapping[keys[i + h]])
+                if i + h < n else fmt(keys[i], mapping[keys[i]])
+                for i in range(h))
     else:
-        for key in keys:
-            print(fmt.format(key, mapping[key]))
+        h = len(keys)
+        rows = (fmt(key, mapping[key]) for key in keys)
+    _print_rows(rows, h, lines, input)
     return first
 
 
+def _print_rows(rows, count, lines, input):
+    """Print *count* menu rows, a screenful at a time when interactive.
+
+    Rows are formatted as they are printed, so a long menu the user stops
+    paging through is never formatted in full.
+    """
+    page = max(1, lines - 2)
+    if input is None or count <= page or not sys.stdout.isatty():
+        page = count
+    shown = 0
+    while shown < count:
+        chunk = list(islice(rows, page))
+        if not chunk:
+            break
+        print("\n".join(chunk))
+        shown += len(chunk)
+        if shown < count:
+            try:
+                answer = input("-- {} more, Enter to list, q to stop -- ".format(count - shown))
+            except EOFError:
+                break
+            if answer[:1] in ("q", "Q"):
+                break
+
+
 def _test(argv):
     print("columns:", COLUMNS, "ines:", LINES)
 
@@ -51,7 +51,11 @@ class Theme:
         self._ps2 = ps2  # more input needed
         self._ps3 = ps3  # choose prompt
         self._ps4 = ps4  # input prompt
-        self._setcolors()
+        # The colors are class attributes, so set them once per theme class.
+        cls = type(self)
+        if not cls.__dict__.get("_colors_set"):
+            self._setcolors()
+            cls._colors_set = True
 
     def _set_ps1(self, new):
         self._ps1 = str(new)
@@ -19,18 +19,32 @@ User Interface base classes and themes.
 __all__ = ['UserInterface', 'FormatWrapper']
 
 import os
+import io
+import re
 import time
 import textwrap
+from contextlib import contextmanager
+from functools import lru_cache
 from pprint import PrettyPrinter
 
 from . import simpleui
 from . import exceptions
-from .fsm import FSM, ANY
 
 # for readline to not count escape sequences as taking up space on one.
 PROMPT_START_IGNORE = '\001'
 PROMPT_END_IGNORE = '\002'
 
+# Fixed for the life of the process.
+_HOSTNAME = os.uname()[1]
+_PRIV = "#" if os.getuid() == 0 else ">"
+
+_PLAIN_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# Percent-expansions: %% is a percent sign, %{NAME} an environment variable,
+# %[F123] (or %[123]) and %[B123] foreground and background colors, and %x
+# whatever is registered for the character x.
+_EXPANSION_RE = re.compile(r"%(?:(%)|\{([^}]*)\}|\[(F\d*|\d+)\]|\[B(\d*)\]|(.))", re.S)
+
 
 class UserInterface:
     """An ANSI terminal user interface for CLIs.  """
@@ -39,11 +53,24 @@ class UserInterface:
         self.environ = environment
         assert hasattr(self.environ, "get"), "Need Environ object with 'get' method"
         self.environ["_"] = None
-        self._cache = {}
+        self._batch = None
+        self._interactive = self._io.isatty()
+        self._ttyname = None
+        self._ps_cache = {}  # prompt string -> parts from _compile_prompt
         self.set_theme(theme)
-        self._initfsm()
-        self._printer = PrettyPrinter(indent=1, width=self._io.columns,
-                                      depth=None, stream=self._io, compact=False)
+        self._init_expansions()
+        self._printer_width = None
+        self._printer = None
+
+    def _get_printer(self):
+        # ConsoleIO forgets its size on SIGWINCH, so a changed width here
+        # means the terminal was resized.
+        width = self._io.columns
+        if width != self._printer_width:
+            self._printer_width = width
+            self._printer = PrettyPrinter(indent=1, width=width,
+                                          depth=None, stream=self._io, compact=True)
+        return self._printer
 
     @property
     def columns(self):
@@ -60,6 +87,7 @@ class UserInterface:
 
     def set_theme(self, theme):
         self._theme = theme
+        self._ps_cache.clear()
         self.environ["PS1"] = self._theme.ps1
         self.environ["PS2"] = self._theme.ps2
         self.environ["PS3"] = self._theme.ps3
@@ -68,39 +96,98 @@ class UserInterface:
     def clone(self, theme=None):
         return self.__class__(self._io, self.environ.copy(), theme or self._theme)
 
+    @contextmanager
+    def batched(self):
+        """Collect output written inside the block and write it all at once.
+
+        Output is not batched when interacting with a terminal, where it is
+        paged and should appear as it is produced.
+        """
+        if self._batch is not None or self._io.isatty():
+            yield
+            return
+        self._batch = io.StringIO()
+        try:
+            yield
+        finally:
+            text = self._batch.getvalue()
+            self._batch = None
+            if text:
+                try:
+                    self._io.write(text)
+                except exceptions.PageQuit:
+                    pass
+                self._io.flush()
+
     def print(self, *objs, **kwargs):
+        if self._batch is not None:
+            kwargs.pop("file", None)
+            print(*objs, **kwargs, file=self._batch)
+            return
         try:
             self._io.print(*objs, **kwargs)
         except exceptions.PageQuit:
             return
 
-    def pprint(self, obj):
-        self._printer.pprint(obj)
+    def pprint(self, obj, compact=None, depth=None):
+        """Pretty-print obj, packing sequence items up to the terminal width.
+
+        Pass compact=False to put each item on its own line instead, or a
+        depth to limit how far nested containers are shown.
+        """
+        if compact is not None or depth is not None:
+            PrettyPrinter(indent=1, width=self._io.columns, depth=depth, stream=self._io,
+                          compact=True if compact is None else compact).pprint(obj)
+            return
+        # A short list or tuple of plain values comes out of PrettyPrinter as
+        # its repr on one line, so write that without walking it.
+        printer = self._get_printer()
+        width = self._printer_width
+        if (type(obj) in (list, tuple) and len(obj) < width and
+                all(type(item) in _PLAIN_TYPES for item in obj)):
+            rep = repr(obj)
+            if len(rep) <= width:
+                self._io.write(rep + "\n")
+                return
+        printer.pprint(obj)
 
     def print_obj(self, obj, nl=1):
-        self._io.write(str(obj))
-        if nl:
-            self._io.write("\n")
-        self._io.flush()
+        text = str(obj) + "\n" if nl else str(obj)
+        if self._batch is not None:
+            self._batch.write(text)
+            return
+        self._io.write(text)
+        if self._interactive:  # otherwise let the stream buffer it
+            self._io.flush()
+
+    def print_objs(self, objs):
+        """Print each object on its own line, with a single write."""
+        self.print_obj("\n".join(map(str, objs)))
 
     def print_list(self, clist, indent=0):
         if clist:
             width = self._io.columns - 9
             indent = min(max(indent, 0), width)
-            ps = " " * indent
+            margin = " " * indent
+            parts = [margin]
+            linewidth = indent  # of the line being filled
+            for c in clist[:-1]:
+                cs = "%s, " % (c,)
+                if linewidth + len(cs) > width:
+                    parts.append("\n")
+                    parts.append(margin)
+                    linewidth = indent
+                parts.append(cs)
+                linewidth += len(cs)
+            parts.append("{}".format(clist[-1]))
             try:
-                for c in clist[:-1]:
-                    cs = "%s, " % (c,)
-                    if len(ps) + len(cs) > width:
-                        self.print_obj(ps)
-                        ps = "%s%s" % (" " * indent, cs)
-                    else:
-                        ps += cs
-                self.print_obj("{}{}".format(ps, clist[-1]))
+                self.print_obj("".join(parts))
             except exceptions.PageQuit:
                 pass
 
     def write(self, text):
+        if self._batch is not None:
+            return self._batch.write(text)
         return self._io.write(text)
 
     def writeerror(self, text):
@@ -111,18 +198,58 @@ class UserInterface:
         self.write(self.prompt_format(text))
 
     def error(self, text):
-        self.printf("%r{}%N\n".format(text))
+        self.write(self._error_start + text + self._message_end)
 
     def warning(self, text):
-        self.printf("%Y{}%N\n".format(text))
+        self.write(self._warning_start + text + self._message_end)
 
     # user input
     def _get_prompt(self, name, prompt=None):
         return self._input_prompt_format(prompt or self.environ[name])
 
     def _input_prompt_format(self, ps):
-        self._fsm.process_string(ps)
-        return self._getarg()
+        if "%" not in ps:
+            return ps or None
+        # The same few prompts are shown over and over, so keep them split
+        # into constant text and the parts that have to be evaluated each time.
+        try:
+            parts = self._ps_cache[ps]
+        except KeyError:
+            if len(self._ps_cache) >= 64:
+                self._ps_cache.clear()
+            parts = self._ps_cache[ps] = self._compile_prompt(ps)
+        return "".join([text if func is None else str(func(text))
+                        for text, func in parts]) or None
+
+    def _compile_prompt(self, ps):
+        """Split prompt string into a list of (text, func) pairs.
+
+        Where func is None the text is used as is, otherwise func(text) is
+        called when the prompt is shown.
+        """
+        parts = []
+        literal = []
+        pos = 0
+        for match in _EXPANSION_RE.finditer(ps):
+            literal.append(ps[pos:match.start()])
+            pos = match.end()
+            varname, c = match.group(2, 5)
+            if varname is not None:
+                func, text = self._environ_value, varname
+            elif c is not None and c in self._dynamic_prompt:
+                func, text = self._dynamic_prompt[c], c
+            else:
+                literal.append(self._prompt_sub(match))
+                continue
+            parts.append(("".join(literal), None))
+            parts.append((text, func))
+            literal = []
+        literal.append(ps[pos:])
+        parts.append(("".join(literal), None))
+        return [part for part in parts if part[0] or part[1] is not None]
+
+    def _environ_value(self, name):
+        return self.environ.get(name, name)
 
     def user_input(self, prompt=None):
         return self._io.input(self._get_prompt("PS1", prompt))
@@ -190,10 +317,10 @@ class UserInterface:
                                  error=self.error)
 
     def yes_no(self, prompt, default=True):
+        prompt = self.prompt_format(prompt)
+        default = "Y" if default else "N"
         while 1:
-            yesno = simpleui.get_input(self.prompt_format(prompt),
-                                       "Y" if default else "N",
-                                       self._io.input)
+            yesno = simpleui.get_input(prompt, default, self._io.input)
             yesno = yesno.upper()
             if yesno.startswith("Y"):
                 return True
@@ -207,7 +334,7 @@ class UserInterface:
         if i > 0:
             return (color + s[:i] +
                     self._theme.NORMAL +
-                    textwrap.indent(textwrap.dedent(self.prompt_format(s[i:])), "  ") +
+                    _indent_doc(self.prompt_format(s[i:])) +
                     "\n")
         else:
             return color + s + self._theme.NORMAL + "\n"
@@ -217,13 +344,20 @@ class UserInterface:
 
     def prompt_format(self, ps):
         "Expand percent-exansions in a string and return the result."
-        self._ffsm.process_string(ps)
-        if self._ffsm.arg:
-            arg = self._ffsm.arg
-            self._ffsm.arg = ''
-            return arg
-        else:
-            return None
+        if "%" not in ps:
+            return ps or None
+        return _EXPANSION_RE.sub(self._prompt_sub, ps) or None
+
+    def prompt_format_with(self, ps, extra):
+        """Expand percent-expansions like prompt_format, but look up single
+        characters in the *extra* mapping first.
+        """
+        def sub(match):
+            c = match.group(5)
+            if c is not None and c in extra:
+                return str(extra[c])
+            return self._prompt_sub(match)
+        return _EXPANSION_RE.sub(sub, ps) or None
 
     def format_wrap(self, obj, formatstring):
         return FormatWrapper(obj, self, formatstring)
@@ -237,209 +371,146 @@ class UserInterface:
         if key not in self._PROMPT_EXPANSIONS:
             self._PROMPT_EXPANSIONS[key] = func
             self._FORMAT_EXPANSIONS[key] = func
+            self._dynamic_prompt[key] = func
+            self._ps_cache.clear()
         else:
             raise ValueError("expansion key !r{} already exists.".format(key))
 
     def unregister_expansion(self, key):
         key = str(key)[0]
-        try:
-            del self._PROMPT_EXPANSIONS[key]
-            del self._FORMAT_EXPANSIONS[key]
-        except KeyError:
-            pass
+        for table in (self._PROMPT_EXPANSIONS, self._FORMAT_EXPANSIONS,
+                      self._static_prompt, self._dynamic_prompt):
+            table.pop(key, None)
+        self._ps_cache.clear()
 
-    # FSM for prompt expansion
-    def _initfsm(self):
+    def _init_expansions(self):
         # maps percent-expansion items to some value.
-        theme = self._theme
-        # Used in prompt strings given to readline library.
-        self._PROMPT_EXPANSIONS = {
-            "I": PROMPT_START_IGNORE + theme.BRIGHT + PROMPT_END_IGNORE,
-            "N": PROMPT_START_IGNORE + theme.NORMAL + PROMPT_END_IGNORE,
-            "D": PROMPT_START_IGNORE + theme.DEFAULT + PROMPT_END_IGNORE,
-            "R": PROMPT_START_IGNORE + theme.BRIGHTRED + PROMPT_END_IGNORE,
-            "G": PROMPT_START_IGNORE + theme.BRIGHTGREEN + PROMPT_END_IGNORE,
-            "Y": PROMPT_START_IGNORE + theme.BRIGHTYELLOW + PROMPT_END_IGNORE,
-            "B": PROMPT_START_IGNORE + theme.BRIGHTBLUE + PROMPT_END_IGNORE,
-            "M": PROMPT_START_IGNORE + theme.BRIGHTMAGENTA + PROMPT_END_IGNORE,
-            "C": PROMPT_START_IGNORE + theme.BRIGHTCYAN + PROMPT_END_IGNORE,
-            "W": PROMPT_START_IGNORE + theme.BRIGHTWHITE + PROMPT_END_IGNORE,
-            "r": PROMPT_START_IGNORE + theme.RED + PROMPT_END_IGNORE,
-            "g": PROMPT_START_IGNORE + theme.GREEN + PROMPT_END_IGNORE,
-            "y": PROMPT_START_IGNORE + theme.YELLOW + PROMPT_END_IGNORE,
-            "b": PROMPT_START_IGNORE + theme.BLUE + PROMPT_END_IGNORE,
-            "m": PROMPT_START_IGNORE + theme.MAGENTA + PROMPT_END_IGNORE,
-            "c": PROMPT_START_IGNORE + theme.CYAN + PROMPT_END_IGNORE,
-            "w": PROMPT_START_IGNORE + theme.WHITE + PROMPT_END_IGNORE,
+        prompt_colors, format_colors = _theme_expansions(self._theme)
+        other = {
             "n": "\n",
             "l": self._tty,
-            "h": self._hostname,
-            "u": self._username,
-            "$": self._priv,
+            "h": _HOSTNAME,
+            "u": self._username(),
+            "$": _PRIV,
             "d": self._cwd,
             "L": self._shlvl,
             "t": self._time,
             "T": self._date,
         }
-
-        self._FORMAT_EXPANSIONS = {
-            "I": theme.BRIGHT,
-            "N": theme.NORMAL,
-            "D": theme.DEFAULT,
-            "R": theme.BRIGHTRED,
-            "G": theme.BRIGHTGREEN,
-            "Y": theme.BRIGHTYELLOW,
-            "B": theme.BRIGHTBLUE,
-            "M": theme.BRIGHTMAGENTA,
-            "C": theme.BRIGHTCYAN,
-            "W": theme.BRIGHTWHITE,
-            "r": theme.RED,
-            "g": theme.GREEN,
-            "y": theme.YELLOW,
-            "b": theme.BLUE,
-            "m": theme.MAGENTA,
-            "c": theme.CYAN,
-            "w": theme.WHITE,
-            "n": "\n",
-            "l": self._tty,
-            "h": self._hostname,
-            "u": self._username,
-            "$": self._priv,
-            "d": self._cwd,
-            "L": self._shlvl,
-            "t": self._time,
-            "T": self._date,
-        }
-
-        fp = FSM(0)
-        self._fsmstates(fp)
-        self._fsm = fp
-
-        ff = FSM(0)
-        self._fsmstates(ff)
-        self._ffsm = ff
-
-    def _fsmstates(self, fsm):
-        fsm.add_default_transition(self._error, 0)
-        # add text to args
-        fsm.add_transition(ANY, 0, self._addtext, 0)
-        # percent escapes
-        fsm.add_transition("%", 0, None, 1)
-        fsm.add_transition("%", 1, self._addtext, 0)
-        fsm.add_transition("{", 1, self._startvar, 2)
-        fsm.add_transition("}", 2, self._endvar, 0)
-        fsm.add_transition("[", 1, None, 3)
-        fsm.add_transition("F", 3, self._startfg, 4)
-        fsm.add_transition("B", 3, self._startbg, 5)
-        fsm.add_transitions("0123456789", 3, self._startfgd, 4)
-        fsm.add_transitions("0123456789", 4, self._fgnum, 4)
-        fsm.add_transitions("0123456789", 5, self._bgnum, 5)
-        fsm.add_transition("]", 4, self._setfg, 0)
-        fsm.add_transition("]", 5, self._setbg, 0)
-        fsm.add_transition(ANY, 2, self._vartext, 2)
-        fsm.add_transition(ANY, 1, self._prompt_expand, 0)
-        fsm.arg = ''
-
-    def _startvar(self, c, fsm):
-        fsm.varname = ""
-
-    def _vartext(self, c, fsm):
-        fsm.varname += c
-
-    def _endvar(self, c, fsm):
-        fsm.arg += str(self.environ.get(fsm.varname, fsm.varname))
-
-    def _startbg(self, c, fsm):
-        fsm.bgcol = ""
-
-    def _startfg(self, c, fsm):
-        fsm.fgcol = ""
-
-    def _startfgd(self, c, fsm):
-        fsm.fgcol = c
-
-    def _fgnum(self, c, fsm):
-        fsm.fgcol += c
-
-    def _bgnum(self, c, fsm):
-        fsm.bgcol += c
-
-    def _setfg(self, c, fsm):
-        fsm.arg += (PROMPT_START_IGNORE + "\x1b[38;5;" + fsm.fgcol + "m" + PROMPT_END_IGNORE)
-
-    def _setbg(self, c, fsm):
-        fsm.arg += (PROMPT_START_IGNORE + "\x1b[48;5;" + fsm.bgcol + "m" + PROMPT_END_IGNORE)
-
-    def _prompt_expand(self, c, fsm):
-        return self._expand(c, fsm, self._PROMPT_EXPANSIONS)
-
-    def _format_expand(self, c, fsm):
-        return self._expand(c, fsm, self._FORMAT_EXPANSIONS)
-
-    def _expand(self, c, fsm, mapping):
-        try:
-            arg = self._cache[c]
-        except KeyError:
-            try:
-                arg = mapping[c]
-            except KeyError:
-                arg = c
-            else:
-                if callable(arg):
-                    arg = str(arg(c))
-        fsm.arg += arg
-
-    def _username(self, c):
-        un = os.environ.get("USERNAME") or os.environ.get("USER")
-        if un:
-            self._cache[c] = un
-        return un
+        # Used in prompt strings given to readline library.
+        self._PROMPT_EXPANSIONS = {**prompt_colors, **other}
+        self._FORMAT_EXPANSIONS = {**format_colors, **other}
+        # Split into constant text and the functions that must be called on
+        # every expansion, so that expanding is mostly a single dict lookup.
+        self._static_prompt = {k: v for k, v in self._PROMPT_EXPANSIONS.items()
+                               if isinstance(v, str)}
+        self._dynamic_prompt = {k: v for k, v in self._PROMPT_EXPANSIONS.items()
+                                if callable(v)}
+        # Fixed here, so that unregistering a color key does not affect them.
+        self._error_start = prompt_colors["r"]
+        self._warning_start = prompt_colors["Y"]
+        self._message_end = prompt_colors["N"] + "\n"
+
+    def _prompt_sub(self, match):
+        percent, varname, fgcol, bgcol, c = match.groups()
+        if c is not None:
+            arg = self._static_prompt.get(c)
+            if arg is None:
+                func = self._dynamic_prompt.get(c)
+                arg = c if func is None else str(func(c))
+            return arg
+        if varname is not None:
+            return str(self.environ.get(varname, varname))
+        if fgcol is not None:
+            return _color256(38, fgcol.lstrip("F"))
+        if bgcol is not None:
+            return _color256(48, bgcol)
+        return percent
+
+    def _username(self):
+        return str(os.environ.get("USERNAME") or os.environ.get("USER"))
+
+    def invalidate_cache(self):
+        """Look up again the prompt values that are otherwise kept for the
+        session: the user name and the tty name.
+        """
+        username = self._username()
+        for table in (self._PROMPT_EXPANSIONS, self._FORMAT_EXPANSIONS, self._static_prompt):
+            table["u"] = username
+        self._ttyname = None
+        self._ps_cache.clear()
 
     def _shlvl(self, c):
         return str(self.environ.get("SHLVL", ""))
 
-    def _hostname(self, c):
-        hn = os.uname()[1]
-        self._cache[c] = hn
-        return hn
-
-    def _priv(self, c):
-        if os.getuid() == 0:
-            arg = "#"
-        else:
-            arg = ">"
-        self._cache[c] = arg
-        return arg
-
     def _tty(self, c):
-        n = os.ttyname(self._io.fileno())
-        self._cache[c] = n
-        return n
+        if self._ttyname is None:
+            self._ttyname = os.ttyname(self._io.fileno())
+        return self._ttyname
 
     def _cwd(self, c):
         return os.getcwd()
 
     def _time(self, c):
-        return time.strftime("%H:%M:%S", time.localtime())
+        return _strftime("%H:%M:%S", int(time.time()))
 
     def _date(self, c):
-        return time.strftime("%m/%d/%Y", time.localtime())
+        return _strftime("%m/%d/%Y", int(time.time()))
+
+
+# Percent-expansion keys for theme colors.
+_COLOR_KEYS = (
+    ("I", "BRIGHT"),
+    ("N", "NORMAL"),
+    ("D", "DEFAULT"),
+    ("R", "BRIGHTRED"),
+    ("G", "BRIGHTGREEN"),
+    ("Y", "BRIGHTYELLOW"),
+    ("B", "BRIGHTBLUE"),
+    ("M", "BRIGHTMAGENTA"),
+    ("C", "BRIGHTCYAN"),
+    ("W", "BRIGHTWHITE"),
+    ("r", "RED"),
+    ("g", "GREEN"),
+    ("y", "YELLOW"),
+    ("b", "BLUE"),
+    ("m", "MAGENTA"),
+    ("c", "CYAN"),
+    ("w", "WHITE"),
+)
+
+
+@lru_cache(maxsize=8)
+def _theme_expansions(theme):
+    """Return the color expansions of theme, for prompts and for plain text.
+
+    Shared by every UserInterface (and clone) using the same theme; do not
+    modify them.
+    """
+    format_colors = {key: getattr(theme, name) for key, name in _COLOR_KEYS}
+    prompt_colors = {key: PROMPT_START_IGNORE + code + PROMPT_END_IGNORE
+                     for key, code in format_colors.items()}
+    return prompt_colors, format_colors
 
-    def _error(self, input_symbol, fsm):
-        self._io.errlog(
-            'Prompt string error: {!r}'.format(input_symbol))
-        fsm.reset()
 
-    def _addtext(self, c, fsm):
-        fsm.arg += c
+@lru_cache(maxsize=128)
+def _indent_doc(text):
+    # Help text is shown again and again, and the expanded text is usually
+    # the same each time.
+    return textwrap.indent(textwrap.dedent(text), "  ")
 
-    def _getarg(self):
-        if self._fsm.arg:
-            arg = self._fsm.arg
-            self._fsm.arg = ''
-            return arg
-        else:
-            return None
+
+@lru_cache(maxsize=256)
+def _color256(layer, num):
+    """Escape sequence for 256-color palette entry, hidden from readline."""
+    return PROMPT_START_IGNORE + "\x1b[%d;5;%sm" % (layer, num) + PROMPT_END_IGNORE
+
+
+@lru_cache(maxsize=4)
+def _strftime(fmt, seconds):
+    # Keyed on the whole second, so prompts shown in quick succession format
+    # the time only once.
+    return time.strftime(fmt, time.localtime(seconds))
 
 
 class FormatWrapper:
@@ -448,20 +519,15 @@ class FormatWrapper:
     The prompt_format string should have an '%O' component that will be expanded to
     the stringified object given here.
     """
+    __slots__ = ("value", "_ui", "_format")
+
     def __init__(self, obj, ui, prompt_format):
         self.value = obj
         self._ui = ui
         self._format = prompt_format
 
     def __str__(self):
-        self._ui.register_expansion("O", self._str_value)
-        try:
-            return self._ui.prompt_format(self._format)
-        finally:
-            self._ui.unregister_expansion("O")
-
-    def _str_value(self, c):
-        return str(self.value)
+        return self._ui.prompt_format_with(self._format, {"O": self.value})
 
     def __len__(self):
         return len(str(self.value))
@@ -19,6 +19,9 @@ Miscellaneous utility functions.
 
 import os
 import glob
+from itertools import chain
+
+_MAGIC = frozenset("*?[")  # what glob.has_magic looks for
 
 
 def globargv(argv):
@@ -28,10 +31,14 @@ def globargv(argv):
     """
     if len(argv) > 1:
         newargv = [argv[0]]
-        for rawarg in argv[1:]:
-            arg = os.path.expandvars(os.path.expanduser(rawarg))
-            gl = glob.has_magic(arg) and glob.glob(arg) or [arg]
-            newargv.extend(gl)
+        newargv.extend(chain.from_iterable(map(_expand_arg, argv[1:])))
         return newargv
     else:
         return argv
+
+
+def _expand_arg(rawarg):
+    arg = os.path.expandvars(os.path.expanduser(rawarg))
+    if not _MAGIC.isdisjoint(arg):
+        return glob.glob(arg) or (arg,)
+    return (arg,)
@@ -47,8 +47,10 @@ def choose(somelist, defidx=0, prompt="choose", lines=LINES, columns=COLUMNS):
 def _choose(stdscr, somelist, defidx, prompt, lines, columns):
     oldcur = curses.curs_set(0)
     pad = curses.newpad(len(somelist) + 1, columns - 2)
-    for line in somelist:
-        pad.addstr(str(line))
+    # One item per pad row, cut short of the pad width so nothing wraps and
+    # row numbers stay list indexes.
+    width = columns - 3
+    pad.addstr("\n".join(str(line).rstrip("\n")[:width] for line in somelist))
 
     pminrow = defidx  # also somelist index
     pmincol = 0
@@ -72,6 +74,7 @@ def _choose(stdscr, somelist, defidx, prompt, lines, columns):
     J, K = [b'jk'[i] for i in range(2)]
     esc = False
     while 1:
+        prev = pminrow
         ch = stdscr.getch()
         if ch in (curses.KEY_DOWN, J):
             pminrow = min(len(somelist) - 1, max(0, pminrow + 1))
@@ -82,6 +85,8 @@ def _choose(stdscr, somelist, defidx, prompt, lines, columns):
         elif ch == curses.ascii.ESC:
             esc = True
             break
+        if pminrow == prev:  # at either end of the list, or some other key
+            continue
 
         if pminrow > 0:
             topwin.clear()
@@ -91,7 +96,7 @@ def _choose(stdscr, somelist, defidx, prompt, lines, columns):
 #                        smaxrow_top, smaxcol)
 #            pad.chgat(sminrow_top, 0, smaxcol - 1, curses.A_NORMAL)
 
-        pad.chgat(pminrow + 1, 0, smaxcol - 1, curses.A_NORMAL)
+        pad.chgat(prev, 0, smaxcol - 1, curses.A_NORMAL)
         pad.chgat(pminrow, 0, smaxcol - 1, curses.A_REVERSE)
         pad.noutrefresh(pminrow, pmincol, sminrow, smincol, smaxrow, smaxcol)
         curses.doupdate()
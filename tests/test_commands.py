@@ -0,0 +1,99 @@
+#!/usr/bin/env python3.5
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit tests for elicit.commands module.
+"""
+
+from elicit import commands
+from elicit import env
+
+
+def test_evaluate_literals():
+    args, kwargs = commands.evaluate_arguments(["1", "2.5", "'s'", "x=[1]", "None"])
+    assert args == (1, 2.5, "s", None)
+    assert kwargs == {"x": [1]}
+
+
+def test_evaluate_names():
+    args, _ = commands.evaluate_arguments(["len", "spam", "val"], {"val": 3})
+    assert args == (len, "spam", 3)
+
+
+def test_evaluate_module_names_stay_words():
+    # Modules the commands module happens to import are not arguments.
+    words = ["copy", "ast", "keyword", "builtins", "lru_cache", "UserDict", "FunctionType"]
+    args, _ = commands.evaluate_arguments(words)
+    assert args == tuple(words)
+
+
+def test_evaluate_literal_not_shared():
+    first, _ = commands.evaluate_arguments(["[1, 2]"])
+    first[0].append(3)
+    second, _ = commands.evaluate_arguments(["[1, 2]"])
+    assert second == ([1, 2],)
+
+
+class FakeUI:
+    def __init__(self):
+        self.environ = env.Environ()
+
+
+def test_aliases_shared():
+    aliases = commands._Aliases({"p": ["print"]})
+    first = commands.BaseCommands(FakeUI(), aliases=aliases)
+    first._aliases["l"] = ["list"]
+    second = commands.BaseCommands(FakeUI(), aliases=aliases)
+    assert second._aliases is aliases
+    assert second._aliases.expand("l") == ["list"]
+
+
+def test_aliases_plain_dict_copied():
+    aliases = {"p": ["print"]}
+    cmds = commands.BaseCommands(FakeUI(), aliases=aliases)
+    aliases["l"] = ["list"]
+    assert cmds._aliases.expand("p") == ["print"]
+    assert cmds._aliases.expand("l") is None
+
+
+def test_alias_expand_chain():
+    aliases = commands._Aliases({"ll": ["ls", "-l"], "lla": ["ll", "-a"]})
+    assert aliases.expand("lla") == ["ls", "-l", "-a"]
+    assert aliases.expand("ll") == ["ls", "-l"]
+    assert aliases.expand("ls") is None
+
+
+def test_alias_expand_loop():
+    aliases = commands._Aliases({"a": ["b", "1"], "b": ["a", "2"]})
+    assert aliases.expand("a") == ["a", "2", "1"]
+
+
+def test_alias_expand_after_change():
+    aliases = commands._Aliases({"x": ["y"]})
+    assert aliases.expand("x") == ["y"]
+    aliases["y"] = ["z", "arg"]
+    assert aliases.expand("x") == ["z", "arg"]
+    del aliases["y"]
+    assert aliases.expand("x") == ["y"]
+    expansion = aliases.expand("x")
+    expansion.append("changed")  # callers may extend the result
+    assert aliases.expand("x") == ["y"]
+
+
+def test_alias_text():
+    aliases = commands._Aliases({"ll": ["ls", "-l"]})
+    assert aliases.text("ll") == "ls -l"
+    assert list(aliases.text_items()) == [("ll", "ls -l")]
+
+# vim:ts=4:sw=4:softtabstop=4:smarttab:expandtab
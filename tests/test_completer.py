@@ -0,0 +1,78 @@
+#!/usr/bin/env python3.5
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit tests for elicit.completer module.
+"""
+
+from elicit import completer
+
+
+def all_matches(comp, text):
+    matches = []
+    state = 0
+    while 1:
+        match = comp.complete(text, state)
+        if match is None:
+            return matches
+        matches.append(match)
+        state += 1
+
+
+def test_get_prefixed():
+    names = ["ab", "abc", "abd", "b", "ba"]
+    assert completer.get_prefixed(names, "ab") == ["ab", "abc", "abd"]
+    assert completer.get_prefixed(names, "b") == ["b", "ba"]
+    assert completer.get_prefixed(names, "c") == []
+    assert completer.get_prefixed(names, "") == names
+
+
+def test_complete_globals():
+    comp = completer.Completer({"spam": 1, "spammer": 2})
+    assert all_matches(comp, "spa") == ["spam", "spammer"]
+    assert all_matches(comp, "lambd") == ["lambda"]
+    assert "len" in all_matches(comp, "le")
+
+
+def test_complete_new_names():
+    namespace = {"spam": 1}
+    comp = completer.Completer(namespace)
+    assert all_matches(comp, "sp") == ["spam"]
+    namespace["spare"] = 2
+    assert all_matches(comp, "sp") == ["spam", "spare"]
+
+
+class Thing:
+    alpha = 1
+    also = 2
+    beta = 3
+
+
+def test_complete_attributes():
+    namespace = {"thing": Thing}
+    comp = completer.Completer(namespace)
+    assert all_matches(comp, "thing.al") == ["thing.alpha", "thing.also"]
+    assert all_matches(comp, "nothing.al") == []
+    namespace["thing"] = int
+    assert all_matches(comp, "thing.real") == ["thing.real"]
+
+
+def test_complete_added_attribute():
+    obj = Thing()
+    comp = completer.Completer({"obj": obj})
+    assert all_matches(comp, "obj.f") == []
+    obj.foo = 1
+    assert all_matches(comp, "obj.f") == ["obj.foo"]
+
+# vim:ts=4:sw=4:softtabstop=4:smarttab:expandtab
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3.5
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit tests for the parsed usage cache in elicit.docopt.
+"""
+
+from elicit import docopt
+
+import pytest
+
+DOC = """Copy files.
+
+Usage:
+    cp [-v] <src>... [--tag=<t>]...
+
+Options:
+    -v         Verbose.
+    --tag=<t>  Tags.
+"""
+
+
+def test_cached_parse():
+    first = docopt.docopt(DOC, ["a", "b", "--tag=x"])
+    assert DOC in docopt._parse_cache
+    second = docopt.docopt(DOC, ["-v", "c"])
+    assert first == {"-v": False, "<src>": ["a", "b"], "--tag": ["x"]}
+    assert second == {"-v": True, "<src>": ["c"], "--tag": []}
+
+
+def test_list_defaults_not_shared():
+    first = docopt.docopt(DOC, ["a"])
+    first["--tag"].append("changed")
+    first["<src>"].append("changed")
+    second = docopt.docopt(DOC, ["b"])
+    assert second["--tag"] == []
+    assert second["<src>"] == ["b"]
+
+
+def test_cached_error():
+    bad = "No usage section here."
+    for _ in range(2):
+        with pytest.raises(docopt.DocoptLanguageError):
+            docopt.docopt(bad, [])
+
+
+def test_cached_usage_exit():
+    for _ in range(2):
+        with pytest.raises(docopt.DocoptExit):
+            docopt.docopt(DOC, ["-x"])
+
+# vim:ts=4:sw=4:softtabstop=4:smarttab:expandtab
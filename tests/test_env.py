@@ -49,3 +49,20 @@ def test_symbol():
     assert d.expand("$?") == "0"
     assert d["?"] == 0
 
+
+def test_expand_no_variables():
+    d = env.Environ(HOME="/home/user")
+    text = "no variables here"
+    assert d.expand(text) is text
+    assert d.expand("") == ""
+
+
+def test_expand_forms():
+    d = env.Environ(HOME="/home/user", N=3, NONE=None)
+    assert d.expand("$HOME/bin") == "/home/user/bin"
+    assert d.expand("${HOME}s") == "/home/users"
+    assert d.expand("$HOMEs") == ""
+    assert d.expand("n=$N ${N}") == "n=3 3"
+    assert d.expand("[$MISSING][${MISSING}][$NONE]") == "[][][]"
+    assert d.expand("cost $ 5") == "cost $ 5"
+    assert d.expand("${}x") == "x"
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3.5
+# vim:ts=4:sw=4:softtabstop=4:smarttab:expandtab
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit tests for elicit.parser module.
+"""
+
+from elicit import env
+from elicit import parser
+
+import pytest
+
+
+class FakeUI:
+    def __init__(self):
+        self.errors = []
+
+    def error(self, text):
+        self.errors.append(text)
+
+
+class FakeController:
+    """Records the argv of each dispatched command."""
+    def __init__(self):
+        self.environ = env.Environ(HOME="/home/user", NAME="world")
+        self._ui = FakeUI()
+        self.calls = []
+
+    def get_command_names(self):
+        return []
+
+    def add_completion_scope(self, name, complist):
+        pass
+
+    def call(self, argv):
+        self.calls.append(argv)
+
+
+@pytest.fixture
+def ctl():
+    return FakeController()
+
+
+@pytest.fixture
+def aparser(ctl):
+    return parser.CommandParser(ctl)
+
+
+def test_words(aparser, ctl):
+    aparser.feed("echo  hello\tworld\n")
+    assert ctl.calls == [["echo", "hello", "world"]]
+
+
+def test_separators(aparser, ctl):
+    aparser.feed("one a; two b;three\n")
+    assert ctl.calls == [["one", "a"], ["two", "b"], ["three"]]
+
+
+def test_quotes(aparser, ctl):
+    aparser.feed("""cmd 'single $NAME' "double $NAME" ''\n""")
+    assert ctl.calls == [["cmd", "single $NAME", "double world", ""]]
+
+
+def test_variables(aparser, ctl):
+    aparser.feed("cmd $HOME/bin ${NAME}s $\n")
+    assert ctl.calls == [["cmd", "/home/user/bin", "worlds", "$"]]
+
+
+def test_escapes(aparser, ctl):
+    aparser.feed('cmd a\\tb "c\\nd" e\\ f\n')
+    assert ctl.calls == [["cmd", "a\tb", "c\nd", "e f"]]
+
+
+def test_continuation(aparser, ctl):
+    assert aparser.feed('cmd "first\n')
+    assert not aparser.feed('second"\n')
+    assert ctl.calls == [["cmd", "first\nsecond"]]
+
+
+def test_split_variable(aparser, ctl):
+    aparser.feed("cmd $NA")
+    aparser.feed("ME\n")
+    assert ctl.calls == [["cmd", "world"]]
+
+
+def test_variable_after_command(aparser, ctl):
+    ctl.call = lambda argv: (ctl.calls.append(argv), ctl.environ.export(argv[1]))
+    aparser.feed("set NAME=one $NAME; set NAME=two $NAME; set X=$NAME\n")
+    assert ctl.calls == [["set", "NAME=one", "world"], ["set", "NAME=two", "one"],
+                         ["set", "X=two"]]
+
+# vim:ts=4:sw=4:softtabstop=4:smarttab:expandtab
@@ -17,6 +17,9 @@
 Test the UI module.
 """
 
+import io
+import os
+
 from elicit import console
 from elicit import themes
 from elicit import env
@@ -81,6 +84,89 @@ def test_ui(myui):
     print(myui.prompt_format("%{PS4}"))
 
 
+@pytest.fixture
+def bufui():
+    """A UserInterface writing to a StringIO, available as its .buffer."""
+    cio = console.ConsoleIO()
+    buf = io.StringIO()
+    cio.stdout = buf
+    cio.write = buf.write
+    cio.flush = buf.flush
+    aui = ui.UserInterface(cio, env.Environ.from_system(), themes.ANSITheme())
+    aui.buffer = buf
+    return aui
+
+
+def test_error_warning_after_unregister(bufui):
+    for key in "rYN":
+        bufui.unregister_expansion(key)
+    bufui.error("bad %d")
+    bufui.warning("careful")
+    assert bufui.buffer.getvalue() == ("\x01\x1b[31m\x02bad %d\x01\x1b[0m\x02\n"
+                                       "\x01\x1b[33;01m\x02careful\x01\x1b[0m\x02\n")
+
+
+def test_print_objs(bufui):
+    writes = []
+
+    def write(text):
+        writes.append(text)
+        return bufui.buffer.write(text)
+    bufui._io.write = write
+    bufui.print_objs([1, "b", None])
+    assert writes == ["1\nb\nNone\n"]
+    assert bufui.buffer.getvalue() == "1\nb\nNone\n"
+
+
+@pytest.fixture(params=["prompt_format", "_input_prompt_format"])
+def expand(request, myui):
+    myui.environ["NAME"] = "world"
+    method = getattr(myui, request.param)
+
+    def expand(ps):
+        first = method(ps)
+        assert method(ps) == first  # cached path of _input_prompt_format
+        return first
+    return expand
+
+
+@pytest.mark.parametrize("ps, expected", [
+    ("plain", "plain"),
+    ("", None),
+    ("100%% done", "100% done"),
+    ("%%%%", "%%"),
+    ("hello %{NAME}!", "hello world!"),
+    ("%{NO_SUCH_VARIABLE}", "NO_SUCH_VARIABLE"),
+    ("%[F123]x", "\x01\x1b[38;5;123m\x02x"),
+    ("%[123]x", "\x01\x1b[38;5;123m\x02x"),
+    ("%[B20]x", "\x01\x1b[48;5;20m\x02x"),
+    ("%Rred%N", "\x01\x1b[31;01m\x02red\x01\x1b[0m\x02"),
+    ("%n", "\n"),
+    ("%q", "q"),
+    ("end%", "end%"),
+    ("end%[", "end["),
+    ("end%{NAME", "end{NAME"),
+])
+def test_expansions(expand, ps, expected):
+    assert expand(ps) == expected
+
+
+def test_dynamic_expansions(expand, myui, tmp_path, monkeypatch):
+    myui.environ["SHLVL"] = "3"
+    monkeypatch.chdir(tmp_path)
+    assert expand("%d %L") == "{} 3".format(os.getcwd())
+    myui.environ["SHLVL"] = "4"
+    os.chdir("/")
+    assert expand("%d %L") == "/ 4"
+
+
+def test_format_wrap(myui):
+    wrapped = myui.format_wrap(42, "value=%O %%")
+    assert str(wrapped) == "value=42 %"
+    assert wrapped == 42
+    assert myui.prompt_format("%O") == "O"
+
+
 if __name__ == "__main__":
     myui = get_userinterface()
     test_ui(myui)